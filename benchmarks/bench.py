@@ -0,0 +1,263 @@
+'''headless throughput benchmark of the snakeG, snakeNEAT and snakeQ engines
+
+Every measure runs in its own Python process, because the three packages
+use the same module names (game, snake, data...) and so peak memory is the
+one of that measure only. The snake follows a Hamiltonian cycle of the
+board, so it never dies whatever its length, which is forced before the
+timer starts.
+
+cases:
+  snake_move       Snake.move_snake_* alone
+  game_step        one move and check_food of the Game
+  foo_env_step     FooEnv.step (snakeQ only)
+  random_food_pos  Game.random_food_pos on a board 99% full
+  redraw_window    one move and redraw_window in a dummy pygame display
+
+> python3 benchmarks/bench.py --output bench.json
+> python3 benchmarks/bench.py --baseline bench.json --tolerance 0.2
+'''
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENGINES = {
+    "snakeG": os.path.join(ROOT, "snakeG"),
+    "snakeNEAT": os.path.join(ROOT, "snakeNEAT"),
+    "snakeQ": os.path.join(ROOT, "snakeQ", "gym-foo", "gym_foo", "envs"),
+}
+
+CASES = ["snake_move", "game_step", "foo_env_step", "random_food_pos", "redraw_window"]
+
+# action -> name of the move method, same order as Game.step
+MOVES = ["move_snake_right", "move_snake_left", "move_snake_up", "move_snake_down"]
+
+
+def cycle_actions(rows):
+    '''return the action to play on each cell y * rows + x to follow a Hamiltonian cycle
+
+    Row 0 goes right, the rows below snake between columns 1 and rows-1 and
+    column 0 goes back up, which needs an even number of rows.
+    '''
+    actions = []
+    for y in range(rows):
+        for x in range(rows):
+            if y == 0:
+                actions.append(0 if x < rows - 1 else 3)
+            elif x == 0:
+                actions.append(2)
+            elif y % 2:
+                actions.append(1 if x > 1 or y == rows - 1 else 3)
+            else:
+                actions.append(0 if x < rows - 1 else 3)
+    return actions
+
+
+def peak_memory_kb():
+    '''return the peak resident memory of this process in KB, None if unknown'''
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, KB elsewhere
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def timed(step, steps):
+    '''call step() steps times, stopping early if it returns False
+
+    return the number of calls, their total time and the time of each call in ns
+    '''
+    latencies = np.zeros(steps, dtype=np.int64)
+    clock = time.perf_counter_ns
+    done = 0
+    start = clock()
+    for i in range(steps):
+        t = clock()
+        more = step()
+        latencies[i] = clock() - t
+        done += 1
+        if more is False:
+            break
+    return done, (clock() - start) / 1e9, latencies[:done]
+
+
+def run_case(spec):
+    '''run one measure in this process and return its result dict'''
+    engine, case, rows, length, steps = spec["engine"], spec["case"], spec["rows"], spec["length"], spec["steps"]
+    sys.path.insert(0, ENGINES[engine])
+    import data.dataUtils as data
+    from game import Game
+
+    config = data.Config(rows=rows, width=max(500, 3 * rows), initial_snake_pos=(0, 0))
+    actions = cycle_actions(rows)
+    headless = case != "redraw_window"
+    if case == "foo_env_step":
+        from foo_env import FooEnv
+        env = FooEnv(config=config, headless=True)
+        game = env.game
+    else:
+        game = Game(config=config, headless=headless)
+    snake = game.snake
+    moves = [getattr(snake, name) for name in MOVES]
+
+    def head_action():
+        x, y = snake.head.pos
+        return actions[y * rows + x]
+
+    # force the length, then put the food back on a free square
+    snake.growth = length - len(snake)
+    while snake.growth:
+        moves[head_action()]()
+    if case != "random_food_pos":
+        game.food.pos = game.random_food_pos()
+
+    if case == "snake_move":
+        def step():
+            moves[head_action()]()
+    elif case == "game_step":
+        game_moves = [getattr(game, name) for name in MOVES]
+        def step():
+            game_moves[head_action()]()
+            game.check_food()
+            return not game.won
+    elif case == "foo_env_step":
+        # done at score 8 is ignored, the snake goes on until the board is full
+        def step():
+            env.step(head_action())
+            return not game.won
+    elif case == "random_food_pos":
+        step = game.random_food_pos
+    else:
+        game_moves = [getattr(game, name) for name in MOVES]
+        game.redraw_window()
+        def step():
+            game_moves[head_action()]()
+            game.check_food()
+            game.redraw_window()
+            return not game.won
+
+    done, seconds, latencies = timed(step, steps)
+    p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+    return dict(spec, steps=done, seconds=seconds, steps_per_sec=done / seconds,
+                latency_ns={"p50": int(p50), "p90": int(p90), "p99": int(p99), "max": int(latencies.max())},
+                peak_rss_kb=peak_memory_kb())
+
+
+def run_in_subprocess(spec):
+    '''run one measure in a new Python process and return its result dict'''
+    env = dict(os.environ, SDL_VIDEODRIVER="dummy", SDL_AUDIODRIVER="dummy", PYGAME_HIDE_SUPPORT_PROMPT="1")
+    proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--worker", json.dumps(spec)],
+                          capture_output=True, text=True, env=env)
+    if proc.returncode != 0:
+        error = proc.stderr.strip().splitlines()
+        return dict(spec, skipped=error[-1] if error else "exit code %d" % proc.returncode)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def key(result):
+    return (result["engine"], result["case"], result["rows"], result["length"])
+
+
+def compare(results, baseline, tolerance):
+    '''print steps/s against the baseline, return the results slower by more than tolerance'''
+    previous = {key(result): result for result in baseline["results"] if "skipped" not in result}
+    regressions = []
+    for result in results:
+        old = previous.get(key(result))
+        if old is None or "skipped" in result:
+            continue
+        ratio = result["steps_per_sec"] / old["steps_per_sec"]
+        flag = ""
+        if ratio < 1 - tolerance:
+            regressions.append(result)
+            flag = "  REGRESSION"
+        print("%-10s %-16s rows %4d len %6d  %12.0f steps/s  x%.2f%s"
+              % (key(result) + (result["steps_per_sec"], ratio, flag)))
+    return regressions
+
+
+def specs(args):
+    '''yield the measures asked for on the command line'''
+    for engine in args.engines:
+        for case in args.cases:
+            if case == "foo_env_step" and engine != "snakeQ":
+                continue
+            for rows in args.rows:
+                if case == "random_food_pos":
+                    lengths = [rows * rows - max(1, rows * rows // 100)]
+                else:
+                    lengths = [length for length in args.lengths if length < rows * rows]
+                for length in lengths:
+                    yield {"engine": engine, "case": case, "rows": rows, "length": length, "steps": args.steps}
+
+
+def csv(kind):
+    return lambda text: [kind(item) for item in text.split(",")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="headless throughput benchmark of the snake engines")
+    parser.add_argument("--engines", type=csv(str), default=list(ENGINES),
+                        help="comma separated engines (default %(default)s)")
+    parser.add_argument("--cases", type=csv(str), default=CASES,
+                        help="comma separated cases (default %(default)s)")
+    parser.add_argument("--rows", type=csv(int), default=[10, 50, 100, 200],
+                        help="comma separated even board sizes (default %(default)s)")
+    parser.add_argument("--lengths", type=csv(int), default=[1, 50, 1000, 10000],
+                        help="comma separated snake lengths, the ones not fitting a board are skipped (default %(default)s)")
+    parser.add_argument("--steps", type=int, default=20000,
+                        help="timed steps per measure (default %(default)s)")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare steps/s with this JSON file of results")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="slowdown against the baseline counted as a regression (default %(default)s)")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_case(json.loads(args.worker))))
+        return 0
+
+    unknown = set(args.engines) - set(ENGINES) | set(args.cases) - set(CASES)
+    if unknown:
+        parser.error("unknown engine or case: %s" % ", ".join(sorted(unknown)))
+    if any(rows % 2 for rows in args.rows):
+        parser.error("--rows must be even numbers")
+
+    results = []
+    for spec in specs(args):
+        result = run_in_subprocess(spec)
+        results.append(result)
+        if "skipped" in result:
+            print("%-10s %-16s rows %4d len %6d  skipped: %s" % (key(result) + (result["skipped"],)))
+        else:
+            print("%-10s %-16s rows %4d len %6d  %12.0f steps/s  p50 %7d ns  p99 %7d ns  %8s KB"
+                  % (key(result) + (result["steps_per_sec"], result["latency_ns"]["p50"],
+                                    result["latency_ns"]["p99"], result["peak_rss_kb"])))
+
+    report = {"python": platform.python_version(), "platform": platform.platform(), "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print()
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("%d regression(s) over %d%%" % (len(regressions), args.tolerance * 100))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
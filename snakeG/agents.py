@@ -0,0 +1,42 @@
+import numpy as np
+
+def play(games, agent):
+    '''play one move in each game still playing with a single agent call
+
+    An agent decides the actions of many games in one call:
+    agent.observe(games) returns the (N, ...) observations of N games and
+    agent.act(observations) their (N,) actions (RIGHT, LEFT, UP or DOWN),
+    so the cost of the Python call is shared by the N games. The games whose
+    snake is dead or that are won are not played. Return the action of each
+    game, -1 for the ones not played.
+    '''
+    actions = np.full(len(games), -1, dtype=np.int64)
+    playing = [i for i, game in enumerate(games) if game.snake.alive and not game.won]
+    if playing:
+        actions[playing] = agent.act(agent.observe([games[i] for i in playing]))
+        for i in playing:
+            games[i].step(int(actions[i]))
+    return actions
+
+
+class GreedyAgent:
+    '''Game.greedy for a batch: observations are rows of head x, head y, food x, food y'''
+
+    # same values as Game
+    RIGHT = 0
+    LEFT = 1
+    UP = 2
+    DOWN = 3
+
+    def observe(self, games):
+        return np.array([game.get_snake_head_pos() + game.get_food_pos() for game in games], dtype=np.int64)
+
+    def act(self, observations):
+        observations = np.asarray(observations)
+        x = observations[:, 0] - observations[:, 2]
+        y = observations[:, 1] - observations[:, 3]
+        # the cases of greedy, in the same order
+        cases = [(x < 0) & (y <= 0), (x >= 0) & (y >= 0), (x >= 0) & (y <= 0), (x < 0) & (y > 0)]
+        choices = [np.where(x < y, self.RIGHT, self.DOWN), np.where(x > y, self.LEFT, self.UP),
+                   np.where(x > np.abs(y), self.LEFT, self.DOWN), np.where(np.abs(x) > y, self.RIGHT, self.UP)]
+        return np.select(cases, choices)
@@ -0,0 +1,130 @@
+import os
+import numpy as np
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "cycles")
+
+# successor arrays already loaded, by rows
+CYCLES = {}
+
+
+def build_cycle(rows):
+    '''return the successor array of a Hamiltonian cycle of the board, cell being y * rows + x
+
+    Row 0 goes right, the rows below snake between columns 1 and rows-1 and
+    column 0 goes back up, which needs an even number of rows. The cycle
+    goes through every cell, a CycleAgent starts it from the snake.
+    '''
+    if rows < 2 or rows % 2:
+        raise ValueError("a Hamiltonian cycle needs an even number of rows, not %d" % rows)
+    successor = np.zeros(rows * rows, dtype=np.int32)
+    for y in range(rows):
+        for x in range(rows):
+            if y == 0:
+                nx, ny = (x + 1, y) if x < rows - 1 else (x, y + 1)
+            elif x == 0:
+                nx, ny = x, y - 1
+            elif y % 2:
+                nx, ny = (x - 1, y) if x > 1 or y == rows - 1 else (x, y + 1)
+            else:
+                nx, ny = (x + 1, y) if x < rows - 1 else (x, y + 1)
+            successor[y * rows + x] = ny * rows + nx
+    return successor
+
+
+def is_cycle(successor):
+    '''return whether successor visits every cell once before coming back'''
+    seen = np.zeros(len(successor), dtype=bool)
+    cell = 0
+    for i in range(len(successor)):
+        if seen[cell]:
+            return False
+        seen[cell] = True
+        cell = successor[cell]
+    return cell == 0
+
+
+def load_cycle(rows, cache_dir=CACHE_DIR):
+    '''return the successor array of the cycle of a board of rows, built once
+
+    The cycle is kept in CYCLES and saved in cache_dir (None to keep it in
+    memory only), the next programs load it instead of building it again.
+    '''
+    successor = CYCLES.get(rows)
+    if successor is not None:
+        return successor
+    path = None if cache_dir is None else os.path.join(cache_dir, "cycle_%d.npy" % rows)
+    if path is not None and os.path.exists(path):
+        successor = np.load(path)
+        if successor.shape != (rows * rows,) or not is_cycle(successor):
+            successor = None
+    if successor is None:
+        successor = build_cycle(rows)
+        if path is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp = path + ".tmp.npy"
+            np.save(tmp, successor)
+            os.replace(tmp, path)
+    CYCLES[rows] = successor
+    return successor
+
+
+class CycleAgent:
+    '''Hamiltonian cycle agent for a Game, playing in place of greedy()
+
+    Following the cycle the snake fills the whole board without ever dying.
+    order gives the index of every cell along the cycle counted from the
+    start, so going along the cycle from the head to the tail only crosses
+    free cells. While the snake covers less than half the board, the head
+    skips ahead to the neighbor furthest along that free stretch, without
+    passing the food and keeping room for the growth to come. Each decision
+    only reads the four neighbors of the head.
+    '''
+    def __init__(self, game, cache_dir=CACHE_DIR, shortcuts=True):
+        self.game = game
+        self.snake = game.snake
+        self.shortcuts = shortcuts
+        rows = game.rows
+        stride = self.snake.stride
+        successor = load_cycle(rows, cache_dir)
+        self.size = rows * rows
+        self.moves = [(1, game.RIGHT), (-1, game.LEFT), (-stride, game.UP), (stride, game.DOWN)]
+        # index along the cycle and action to the successor, by padded cell of the snake grid
+        self.order = [None] * (stride * stride)
+        self.follow = [None] * (stride * stride)
+        actions = dict(self.moves)
+        x, y = game.initial_snake_pos
+        cell = y * rows + x
+        for i in range(self.size):
+            nxt = int(successor[cell])
+            padded = self.snake.cell((cell % rows, cell // rows))
+            self.order[padded] = i
+            self.follow[padded] = actions[self.snake.cell((nxt % rows, nxt // rows)) - padded]
+            cell = nxt
+
+    def __call__(self):
+        '''return the action to play, like greedy()'''
+        snake = self.snake
+        head = snake.cells[0]
+        action = self.follow[head]
+        length = len(snake)
+        if not self.shortcuts or 2 * length > self.size:
+            return action
+
+        order = self.order
+        size = self.size
+        h = order[head]
+        tail = snake.cells[-1]
+        ahead = (order[tail] - h) % size if tail != head else size
+        food = self.game.food.pos
+        limit = min(ahead - snake.growth - 3, (order[snake.cell(food)] - h) % size if food is not None else size)
+        best = 1
+        grid = snake.grid
+        for step, move in self.moves:
+            cell = head + step
+            if grid[cell]:
+                continue
+            skip = (order[cell] - h) % size
+            if best < skip <= limit:
+                best = skip
+                action = move
+        return action
@@ -3,8 +3,69 @@ from pathlib import Path
 
 # config.json
 
+CONFIG_FILE = Path(__file__).resolve().parent / "config.json"
+
+# name of the attribute -> (key in config.json, type)
+CONFIG_KEYS = {
+    "width": ("width", int),
+    "rows": ("rows", int),
+    "square_color": ("squareColor", tuple),
+    "food_color": ("foodColor", tuple),
+    "line_color": ("lineColor", tuple),
+    "board_color": ("boardColor", tuple),
+    "initial_snake_pos": ("initialSnakePos", tuple),
+}
+
+_cache = None
+
+def loadConfig():
+    '''return config.json as a dict, read from disk on the first call only'''
+    global _cache
+    if _cache is None:
+        with open(CONFIG_FILE) as f:
+            _cache = json.load(f)
+    return _cache
+
+def reloadConfig():
+    '''drop the cached config.json and read it again'''
+    global _cache
+    _cache = None
+    return loadConfig()
+
 def getConfig(config):
-    mapFile = Path("snakeG/data/config.json")
-    with open(mapFile) as f:
-        d = json.load(f)
-        return d[config]
+    return loadConfig()[config]
+
+
+class Config:
+    '''typed view of config.json
+
+    Keyword arguments override the file for this instance only, e.g.
+    Config(rows=20) is a 20x20 board with every other value from the file.
+    The initial snake position must be on the board, ValueError otherwise.
+    '''
+    def __init__(self, **overrides):
+        unknown = set(overrides) - set(CONFIG_KEYS)
+        if unknown:
+            raise TypeError("unknown config attribute(s): %s" % ", ".join(sorted(unknown)))
+        self.overrides = overrides
+        self.refresh()
+
+    def refresh(self):
+        '''set the typed attributes from the cached file and the overrides'''
+        values = loadConfig()
+        for name, (key, kind) in CONFIG_KEYS.items():
+            setattr(self, name, kind(self.overrides.get(name, values[key])))
+        x, y = self.initial_snake_pos
+        if not (0 <= x < self.rows and 0 <= y < self.rows):
+            raise ValueError("initial_snake_pos %r is outside the %dx%d board"
+                             % (self.initial_snake_pos, self.rows, self.rows))
+
+    def reload(self):
+        '''read config.json from disk again, keeping the overrides'''
+        reloadConfig()
+        self.refresh()
+
+    @property
+    def square_size(self):
+        '''return the size in pixels of one board square'''
+        return self.width // self.rows
@@ -1,10 +1,10 @@
-import random
-import pygame
 import numpy as np
-from pygame.locals import K_LEFT, K_RIGHT, K_UP, K_DOWN
+import random
 import data.dataUtils as data
 from square import Square
 from snake import Snake
+from scheduler import Scheduler
+import profiler
 
 class Game:
 
@@ -13,18 +13,31 @@ class Game:
     SNAKE = 1
     SPACE = 0
 
-    width = data.getConfig("width")
-    rows = data.getConfig("rows")
-    square_color = data.getConfig("squareColor")
-    initial_snake_pos = data.getConfig("initialSnakePos")
-    food_color = data.getConfig("foodColor")
-    line_color = data.getConfig("lineColor")
-    board_color = data.getConfig("boardColor")
-
-    def __init__(self):
-        '''snake game'''
-        self.snake = Snake(self.initial_snake_pos, self.square_color)
-        self.food = Square(self.random_food_pos(), self.food_color)
+    # actions, same order as FooEnv.step in snakeQ
+    RIGHT = 0
+    LEFT = 1
+    UP = 2
+    DOWN = 3
+
+    def __init__(self, config=None, headless=False, seed=None):
+        '''snake game, config being a data.Config (config.json by default)
+
+        A headless game never creates its renderer, so it runs without
+        opening a window. seed makes the food positions reproducible.
+        '''
+        self.config = config if config is not None else data.Config()
+        self.width = self.config.width
+        self.rows = self.config.rows
+        self.square_color = self.config.square_color
+        self.initial_snake_pos = self.config.initial_snake_pos
+        self.food_color = self.config.food_color
+        self.line_color = self.config.line_color
+        self.board_color = self.config.board_color
+        self.snake = Snake(self.initial_snake_pos, self.square_color, self.rows)
+        self.seeds = random.Random(seed)
+        self.reset()
+        self.headless = headless
+        self.renderer = None
 
     def get_inputs(self):
         return[self.get_snake_head_pos(), self.get_snake_dir(), self.get_food_pos()]
@@ -40,7 +53,7 @@ class Game:
 
     def get_snake_full_pos(self):
         '''return array for each of the snake body pos [x, y]'''
-        return [body.pos for body in self.snake.body]
+        return [self.snake.cell_pos(cell) for cell in self.snake.cells]
 
     def get_snake_dir(self):
         '''return snake dir [x, y]'''
@@ -50,70 +63,115 @@ class Game:
         '''return food pos [x, y]'''
         return self.food.pos
 
+    def get_occupancy(self):
+        '''return the read-only [y, x] occupancy grid of the board, 1 on the snake'''
+        return self.snake.occupancy
+
     def get_score(self):
         '''return len of the snake body'''
-        return len(self.snake.body)
-
-    def draw_grid(self, surface):
-        '''draw visual of the game grid'''
-        size_between = self.width // self.rows
-        grid_x = 0
-        grid_y = 0
-        for l in range(self.rows):
-            grid_x = grid_x + size_between
-            grid_y = grid_y + size_between
-            pygame.draw.line(surface, self.line_color, (grid_x, 0), (grid_x, self.width))
-            pygame.draw.line(surface, self.line_color, (0, grid_y), (self.width, grid_y))
-
-    def redraw_window(self, surface):
+        return len(self.snake)
+
+    def get_renderer(self):
+        '''return the renderer, created on first use, None if headless'''
+        if self.renderer is None and not self.headless:
+            from renderer import Renderer
+            self.renderer = Renderer(self.config)
+        return self.renderer
+
+    def redraw_window(self):
         '''draw visual of the full game board'''
-        surface.fill(self.board_color)
-        self.snake.draw(surface)
-        self.food.draw(surface)
-        self.draw_grid(surface)
-        pygame.display.update()
+        renderer = self.get_renderer()
+        if renderer is not None:
+            renderer.draw(self)
 
     def random_food_pos(self):
-        '''return a valid random food position'''
-        positions = self.snake.body
-        while True:
-            pos = [random.randrange(self.rows), random.randrange(self.rows)]
-            if len(list(filter(lambda z: z.pos == pos, positions))) > 0:
-                continue
-            break
-        return pos
+        '''return a valid random food position, None if the board is full'''
+        cell = self.snake.free.choice(self.rng)
+        if cell is None:
+            return None
+        return self.snake.cell_pos(cell)
+
+    def reset(self, seed=None):
+        '''start a new episode, its food drawn from random.Random(seed)
+
+        Without seed, the episode seed is the next one of the game seed, so a
+        game built with a seed plays the same episodes again. episode_seed is
+        all a Recorder needs to replay the episode from its actions.
+        '''
+        prof = profiler.active
+        if prof: prof.count("episodes")
+        self.episode_seed = self.seeds.getrandbits(63) if seed is None else seed
+        self.rng = random.Random(self.episode_seed)
+        self.snake.reset(self.initial_snake_pos)
+        self.snake.alive = True
+        self.food = Square(self.random_food_pos(), self.food_color)
+        self.won = False
+
+    def eat_food(self):
+        '''grow the snake and put the food on a free square
+
+        When the snake covers the whole board there is no square left for the
+        food: the game is won and the food stays under the head.
+        '''
+        prof = profiler.active
+        if prof: prof.count("foods")
+        pos = self.random_food_pos()
+        if pos is None:
+            self.won = True
+        else:
+            self.snake.add_cube()
+            self.food = Square(pos, self.food_color)
 
     def move_snake_up(self):
-        '''Trigger one input K_UP to the snake'''
-        newevent = pygame.event.Event(pygame.KEYDOWN, unicode='', key=K_UP, mod=pygame.locals.KMOD_NONE, scancode=111, window=None)
-        newevent2 = pygame.event.Event(pygame.KEYUP, key=K_UP, mod=pygame.locals.KMOD_NONE, scancode=111, window=None)
-        pygame.event.post(newevent)
-        pygame.event.post(newevent2)
+        '''Move the snake up'''
+        self.snake.move_snake_up()
 
     def move_snake_down(self):
-        '''Trigger one input K_DOWN to the snake'''
-        newevent = pygame.event.Event(pygame.KEYDOWN, unicode='', key=K_DOWN, mod=pygame.locals.KMOD_NONE, scancode=116, window=None)
-        newevent2 = pygame.event.Event(pygame.KEYUP, key=K_DOWN, mod=pygame.locals.KMOD_NONE, scancode=116, window=None)
-        pygame.event.post(newevent)
-        pygame.event.post(newevent2)
+        '''Move the snake down'''
+        self.snake.move_snake_down()
 
     def move_snake_left(self):
-        '''Trigger one input K_LEFT to the snake'''
-        newevent = pygame.event.Event(pygame.KEYDOWN, unicode='', key=K_LEFT, mod=pygame.locals.KMOD_NONE, scancode=113, window=None)
-        newevent2 = pygame.event.Event(pygame.KEYUP, key=K_LEFT, mod=pygame.locals.KMOD_NONE, scancode=113, window=None)
-        pygame.event.post(newevent)
-        pygame.event.post(newevent2)
+        '''Move the snake left'''
+        self.snake.move_snake_left()
 
     def move_snake_right(self):
-        '''Trigger one input K_RIGHT to the snake'''
-        newevent = pygame.event.Event(pygame.KEYDOWN, unicode='', key=K_RIGHT, mod=pygame.locals.KMOD_NONE, scancode=114, window=None)
-        newevent2 = pygame.event.Event(pygame.KEYUP, key=K_RIGHT, mod=pygame.locals.KMOD_NONE, scancode=114, window=None)
-        pygame.event.post(newevent)
-        pygame.event.post(newevent2)
+        '''Move the snake right'''
+        self.snake.move_snake_right()
+
+    def check_food(self):
+        '''eat the food if the head is on it'''
+        if self.snake.head.pos == self.food.pos:
+            self.eat_food()
+
+    def step(self, action):
+        '''play one move, action being RIGHT, LEFT, UP or DOWN, and eat the food under the head'''
+        prof = profiler.active
+        if prof: t = prof.clock()
+        if action == self.RIGHT:
+            self.snake.move_snake_right()
+        elif action == self.LEFT:
+            self.snake.move_snake_left()
+        elif action == self.UP:
+            self.snake.move_snake_up()
+        else:
+            self.snake.move_snake_down()
+        if prof: t = prof.lap("move", t)
+        self.check_food()
+        if prof:
+            prof.lap("food", t)
+            prof.count("moves")
+
+    def quit_game(self):
+        '''close the window, the game goes on headless'''
+        self.headless = True
+        if self.renderer is not None:
+            self.renderer.quit()
+            self.renderer = None
 
     def greedy(self):
         '''
         Méthode vorace qui avais beaucoup plus de succès
+        Retourne l'action à jouer avec step
         '''
         snakePos = self.get_snake_head_pos()
         foodPos = self.get_food_pos()
@@ -125,52 +183,72 @@ class Game:
 
         if (x<0 and y<=0):
             if (x<y):
-                self.move_snake_right()
+                return self.RIGHT
             else:
-                self.move_snake_down()
+                return self.DOWN
         elif(x>=0 and y>=0):
             if (x>y):
-                self.move_snake_left()
+                return self.LEFT
             else:
-                self.move_snake_up()
+                return self.UP
 
         elif (x>=0 and y<=0):
             if (x>abs(y)):
-                self.move_snake_left()
+                return self.LEFT
             else:
-                self.move_snake_down()
+                return self.DOWN
         elif (x<0 and y>0):
             if (abs(x)>y):
-                self.move_snake_right()
+                return self.RIGHT
 
             else:
-                self.move_snake_up()
+                return self.UP
 
 
 
 
-    def start(self):
-        '''Main loop of the game'''
+    def start(self, scheduler=None, recorder=None, agent=None):
+        '''Main loop of the game, paced by scheduler (10 ticks per second by default)
+
+        agent returns the action of each move, greedy by default (see
+        planner.Planner). Every episode is appended to recorder if there is one.
+        '''
+        if scheduler is None:
+            scheduler = Scheduler(fps=10)
+        if agent is None:
+            agent = self.greedy
+        if recorder is not None:
+            recorder.begin(self)
         self.size=0
-        win = pygame.display.set_mode((self.width, self.width))
-        clock = pygame.time.Clock()
         counter = 0
         while True:
-            pygame.time.delay(50)
-            clock.tick(10)
-            #appel send inputs utilise une methode vorace pour faire un mouvement
-            self.greedy()
-            #fonction qui prend les events de deplacement et l'applique
-            self.snake.move()
-
-            #si le serpent a mangé une nourriture
-            if self.snake.body[0].pos == self.food.pos:
-                self.snake.add_cube()
-                self.food = Square(self.random_food_pos(), self.food_color)
-
-            #si le serpent meurt
-            if self.snake.alive == False:
-                print('Score:', len(self.snake.body))
-                self.snake.reset(data.getConfig("initialSnakePos"))
-                self.snake.alive = True
-            self.redraw_window(win)
+            prof = profiler.active
+            if prof: t = prof.clock()
+            draw = scheduler.tick()
+            if prof: t = prof.lap("tick", t)
+            if self.renderer is not None and self.renderer.closed():
+                self.quit_game()
+                if recorder is not None:
+                    recorder.end(self)
+                break
+            if prof: t = prof.lap("events", t)
+            #l'agent (vorace par défaut) choisit un mouvement, step l'applique et mange la nourriture
+            action = agent()
+            if prof: prof.lap("decide", t)
+            self.step(action)
+            if recorder is not None:
+                recorder.record(action, self)
+
+            #si le serpent meurt ou remplit la grille
+            if self.snake.alive == False or self.won:
+                print('Score:', len(self.snake))
+                if recorder is not None:
+                    recorder.end(self)
+                self.reset()
+                if recorder is not None:
+                    recorder.begin(self)
+            if draw:
+                if prof: t = prof.clock()
+                self.redraw_window()
+                if prof: prof.lap("draw", t)
+            if prof: prof.tick()
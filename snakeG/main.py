@@ -1,9 +1,37 @@
 from game import Game
+from scheduler import Scheduler, add_arguments
+import profiler
+from recorder import Recorder
+from planner import Planner
+from cycle_agent import CycleAgent
+import argparse
 import threading
 
 def main():
-    game = Game()
-    x = threading.Thread(target=game.start)
+    parser = argparse.ArgumentParser(description="greedy agent playing snake")
+    parser.add_argument("--agent", choices=["greedy", "planner", "cycle"], default="greedy",
+                        help="greedy heads straight for the food, planner takes the shortest safe path, "
+                             "cycle follows a Hamiltonian cycle with shortcuts (default %(default)s)")
+    add_arguments(parser, fps=10)
+    profiler.add_arguments(parser)
+    parser.add_argument("--seed", type=int, help="seed of the food positions")
+    parser.add_argument("--record", metavar="FILE", help="append every episode to FILE, see replay.py")
+    parser.add_argument("--record-checkpoint-every", type=int, default=0, metavar="N",
+                        help="also record a checkpoint every N moves, checked by the replay")
+    args = parser.parse_args()
+    scheduler = Scheduler.from_args(args)
+    profiler.enable_from_args(args)
+    recorder = Recorder(args.record, args.record_checkpoint_every) if args.record else None
+    game = Game(headless=scheduler.headless, seed=args.seed)
+    agent = None
+    if args.agent == "planner":
+        agent = Planner(game)
+    elif args.agent == "cycle":
+        try:
+            agent = CycleAgent(game)
+        except ValueError as e:
+            parser.error(str(e))
+    x = threading.Thread(target=game.start, args=(scheduler, recorder, agent))
     x.start()
     x.join()
 
@@ -0,0 +1,203 @@
+import heapq
+from collections import deque
+
+INF = 1 << 30
+
+class Planner:
+    '''shortest safe path agent for a Game, playing in place of greedy()
+
+    dist is the BFS distance field from the food over the free cells of the
+    snake grid (padded cell ids, walls and body blocked). It is only rebuilt
+    when the food moves: between two ticks the snake entered one cell and
+    left at most one, so the field is repaired around those two cells.
+
+    The head takes the neighbor closest to the food whose move leaves the
+    tail reachable (an A* search to the tail), so the snake does not close
+    itself in. Without such a move it chases its tail, and without a tail to
+    reach it takes the neighbor with the most room. After chasing it for
+    as many moves as there are cells since the food appeared, it takes the shortest path to the food
+    even if unsafe rather than loop forever.
+    '''
+    def __init__(self, game):
+        self.game = game
+        self.snake = game.snake
+        stride = self.snake.stride
+        self.moves = [(1, game.RIGHT), (-1, game.LEFT), (-stride, game.UP), (stride, game.DOWN)]
+        self.unreached = [INF] * (stride * stride)
+        self.dist = list(self.unreached)
+        self.food = None
+        self.cells = None
+        self.head = None
+        self.tail = None
+        self.chasing = 0
+
+    def __call__(self):
+        '''return the action to play, like greedy()'''
+        self.update()
+        snake = self.snake
+        head = snake.cells[0]
+        if len(snake.cells) == 1 and not snake.growth:
+            moves = [(self.dist[head + step], head + step, action) for step, action in self.moves
+                     if not snake.grid[head + step]]
+            return min(moves)[2] if moves else self.game.RIGHT
+
+        tail = snake.cells[-1]
+        grid = snake.grid
+        candidates = sorted((self.dist[head + step], head + step, action) for step, action in self.moves
+                            if not grid[head + step] or (head + step == tail and not snake.growth))
+        # a tail chase can loop forever around food it never reaches safely
+        bold = self.chasing > len(self.dist)
+        safe = []
+        for dist, cell, action in candidates:
+            if bold and dist < INF:
+                return action
+            length = self.path_length(cell, tail)
+            if length is not None:
+                if dist < INF:
+                    return action
+                safe.append((length, action))
+        if safe:
+            # chasing the tail, the longest way round leaves more room
+            self.chasing += 1
+            return max(safe)[1]
+        if candidates:
+            return max((self.room(cell), action) for dist, cell, action in candidates)[1]
+        return self.game.RIGHT
+
+    def update(self):
+        '''bring dist up to date with the snake and the food'''
+        snake = self.snake
+        food = self.game.food.pos
+        food = None if food is None else snake.cell(food)
+        head = snake.cells[0]
+        # a reset gives the snake new cells, the head may also have been moved by hand
+        if food != self.food or snake.cells is not self.cells or abs(head - self.head) not in (1, snake.stride):
+            self.cells = snake.cells
+            self.rebuild(food)
+        else:
+            if self.tail != head and not snake.grid[self.tail]:
+                self.free(self.tail)
+            self.block(head)
+        self.head = head
+        self.tail = snake.cells[-1]
+
+    def rebuild(self, food):
+        '''compute dist from scratch by a BFS from the food'''
+        self.food = food
+        self.chasing = 0
+        dist = self.dist
+        dist[:] = self.unreached
+        if food is None or self.snake.grid[food]:
+            return
+        dist[food] = 0
+        self.spread(deque([food]))
+
+    def spread(self, queue):
+        '''lower dist around the cells of queue, in BFS order'''
+        dist = self.dist
+        grid = self.snake.grid
+        steps = [step for step, action in self.moves]
+        while queue:
+            u = queue.popleft()
+            d = dist[u] + 1
+            for step in steps:
+                n = u + step
+                if not grid[n] and dist[n] > d:
+                    dist[n] = d
+                    queue.append(n)
+
+    def free(self, cell):
+        '''the tail left cell: give it a distance and lower the cells behind it'''
+        dist = self.dist
+        if cell == self.food:
+            dist[cell] = 0
+        else:
+            # blocked neighbors are at INF
+            d = min(dist[cell + step] for step, action in self.moves) + 1
+            if d >= INF:
+                return
+            dist[cell] = d
+        self.spread(deque([cell]))
+
+    def block(self, cell):
+        '''the head entered cell: raise the cells whose shortest path went through it'''
+        dist = self.dist
+        grid = self.snake.grid
+        steps = [step for step, action in self.moves]
+        old = {cell: dist[cell]}
+        dist[cell] = INF
+        if old[cell] >= INF:
+            return
+        # cells left without a neighbor one step closer to the food, level by level
+        queue = deque([cell])
+        while queue:
+            u = queue.popleft()
+            child = old[u] + 1
+            for step in steps:
+                n = u + step
+                if grid[n] or n in old or dist[n] != child:
+                    continue
+                if any(not grid[n + s] and n + s not in old and dist[n + s] == child - 1 for s in steps):
+                    continue
+                old[n] = dist[n]
+                dist[n] = INF
+                queue.append(n)
+
+        # give them back the distance through their nearest valid neighbor
+        heap = []
+        for u in old:
+            if grid[u]:
+                continue
+            d = min(dist[u + step] for step in steps) + 1
+            if d < INF:
+                dist[u] = d
+                heap.append((d, u))
+        heapq.heapify(heap)
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d != dist[u]:
+                continue
+            for step in steps:
+                n = u + step
+                if not grid[n] and dist[n] > d + 1:
+                    dist[n] = d + 1
+                    heapq.heappush(heap, (d + 1, n))
+
+    def path_length(self, start, goal):
+        '''return the length of the shortest path from start to goal over free cells (A*), None if none'''
+        if start == goal:
+            return 0
+        stride = self.snake.stride
+        grid = self.snake.grid
+        steps = [step for step, action in self.moves]
+        gx, gy = goal % stride, goal // stride
+        seen = {start: 0}
+        heap = [(abs(start % stride - gx) + abs(start // stride - gy), 0, start)]
+        while heap:
+            f, g, u = heapq.heappop(heap)
+            if g != seen[u]:
+                continue
+            for step in steps:
+                n = u + step
+                if n == goal:
+                    return g + 1
+                if grid[n] or seen.get(n, INF) <= g + 1:
+                    continue
+                seen[n] = g + 1
+                heapq.heappush(heap, (g + 1 + abs(n % stride - gx) + abs(n // stride - gy), g + 1, n))
+        return None
+
+    def room(self, start):
+        '''return the number of free cells reachable from start'''
+        grid = self.snake.grid
+        steps = [step for step, action in self.moves]
+        seen = {start}
+        queue = deque([start])
+        while queue:
+            u = queue.popleft()
+            for step in steps:
+                n = u + step
+                if not grid[n] and n not in seen:
+                    seen.add(n)
+                    queue.append(n)
+        return len(seen)
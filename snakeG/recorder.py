@@ -0,0 +1,132 @@
+import struct
+import numpy as np
+
+# seed, moves, score, result, rows, checkpoint_every, checkpoints
+HEADER = struct.Struct("<QIIBHHI")
+# head cell, length, food cell of a checkpoint, cell being y * rows + x
+CHECKPOINT = struct.Struct("<III")
+NO_FOOD = 0xFFFFFFFF
+
+# how an episode ended
+DEAD = 0
+WON = 1
+STOPPED = 2
+
+
+def pack_actions(actions):
+    '''return the actions 0-3 packed 4 per byte, the first one in the low bits'''
+    actions = np.asarray(actions, dtype=np.uint8)
+    padded = np.zeros((len(actions) + 3) // 4 * 4, dtype=np.uint8)
+    padded[:len(actions)] = actions
+    quads = padded.reshape(-1, 4)
+    return (quads[:, 0] | quads[:, 1] << 2 | quads[:, 2] << 4 | quads[:, 3] << 6).tobytes()
+
+
+def unpack_actions(data, moves):
+    '''return the moves first actions packed in data by pack_actions'''
+    packed = np.frombuffer(data, dtype=np.uint8)
+    return ((packed[:, None] >> np.array([0, 2, 4, 6], dtype=np.uint8)) & 3).ravel()[:moves]
+
+
+class Episode:
+    '''one recorded episode: its seed and actions are enough to play it again'''
+    def __init__(self, seed, rows, actions, score, result, checkpoint_every=0, checkpoints=()):
+        self.seed = seed
+        self.rows = rows
+        self.actions = actions
+        self.score = score
+        self.result = result
+        self.checkpoint_every = checkpoint_every
+        self.checkpoints = list(checkpoints)
+
+
+def checkpoint(game):
+    '''return the (head cell, length, food cell) of game'''
+    rows = game.rows
+    x, y = game.snake.head.pos
+    food = game.food.pos
+    return (y * rows + x) % (1 << 32), len(game.snake), NO_FOOD if food is None else food[1] * rows + food[0]
+
+
+class Recorder:
+    '''appends the episodes played by a Game to a binary file
+
+    Each episode is a header (seed, number of moves, score, result, rows,
+    checkpoints) followed by its actions, 2 bits per move, and optionally by
+    a (head, length, food) checkpoint every checkpoint_every moves, which the
+    replay checks. Episodes are only appended, a partly written last one
+    (the program was killed) is ignored by read_episodes.
+    '''
+    def __init__(self, path, checkpoint_every=0):
+        self.file = open(path, "ab")
+        self.checkpoint_every = checkpoint_every
+        self.actions = bytearray()
+        self.checkpoints = []
+        self.seed = None
+
+    def begin(self, game):
+        '''start recording the episode game was just reset for'''
+        self.seed = game.episode_seed
+        self.actions.clear()
+        self.checkpoints.clear()
+
+    def record(self, action, game):
+        '''record the action game just played'''
+        self.actions.append(action)
+        if self.checkpoint_every and len(self.actions) % self.checkpoint_every == 0:
+            self.checkpoints.append(checkpoint(game))
+
+    def end(self, game, result=None):
+        '''write the episode, by default WON, DEAD or else STOPPED as game is now'''
+        if result is None:
+            result = WON if game.won else DEAD if not game.snake.alive else STOPPED
+        header = HEADER.pack(self.seed, len(self.actions), len(game.snake), result, game.rows,
+                             self.checkpoint_every, len(self.checkpoints))
+        body = b"".join(CHECKPOINT.pack(*c) for c in self.checkpoints)
+        self.file.write(header + pack_actions(self.actions) + body)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def read_episodes(path):
+    '''yield the Episodes of a file written by Recorder'''
+    with open(path, "rb") as f:
+        data = f.read()
+    offset = 0
+    while offset + HEADER.size <= len(data):
+        seed, moves, score, result, rows, checkpoint_every, count = HEADER.unpack_from(data, offset)
+        start = offset + HEADER.size
+        end = start + (moves + 3) // 4 + count * CHECKPOINT.size
+        if end > len(data):
+            break
+        actions = unpack_actions(data[start:start + (moves + 3) // 4], moves)
+        checkpoints = [CHECKPOINT.unpack_from(data, start + (moves + 3) // 4 + i * CHECKPOINT.size) for i in range(count)]
+        yield Episode(seed, rows, actions, score, result, checkpoint_every, checkpoints)
+        offset = end
+
+
+def replay(game, episode, step=None, scheduler=None):
+    '''play episode again in game, drawn on the ticks scheduler says to draw
+
+    step plays one action, game.step by default. Raise ValueError if a
+    checkpoint, the death or the final score differ from the recording.
+    '''
+    if game.rows != episode.rows:
+        raise ValueError("episode played on %d rows, game has %d" % (episode.rows, game.rows))
+    step = step if step is not None else game.step
+    game.reset(episode.seed)
+    checkpoints = iter(episode.checkpoints)
+    for i, action in enumerate(episode.actions.tolist(), 1):
+        step(action)
+        if episode.checkpoint_every and i % episode.checkpoint_every == 0:
+            if checkpoint(game) != tuple(next(checkpoints)):
+                raise ValueError("replay differs from the recording at move %d" % i)
+        if scheduler is not None and scheduler.tick():
+            game.redraw_window()
+    if episode.result == DEAD and game.snake.alive:
+        raise ValueError("the snake did not die at the end of the replay")
+    if len(game.snake) != episode.score:
+        raise ValueError("replay score %d, recorded %d" % (len(game.snake), episode.score))
+    return game
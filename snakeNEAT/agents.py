@@ -0,0 +1,107 @@
+import numpy as np
+from neat.graphs import feed_forward_layers
+
+def play(games, agent):
+    '''play one move in each game still playing with a single agent call
+
+    An agent decides the actions of many games in one call:
+    agent.observe(games) returns the (N, ...) observations of N games and
+    agent.act(observations) their (N,) actions (RIGHT, LEFT, UP or DOWN),
+    so the cost of the Python call is shared by the N games. The games whose
+    snake is dead or that are won are not played. Return the action of each
+    game, -1 for the ones not played.
+    '''
+    actions = np.full(len(games), -1, dtype=np.int64)
+    playing = [i for i, game in enumerate(games) if game.snake.alive and not game.won]
+    if playing:
+        actions[playing] = agent.act(agent.observe([games[i] for i in playing]))
+        for i in playing:
+            games[i].step(int(actions[i]))
+    return actions
+
+
+# the activations of neat.activations, on arrays
+ACTIVATIONS = {
+    "sigmoid": lambda z: 1.0 / (1.0 + np.exp(-np.clip(5.0 * z, -60.0, 60.0))),
+    "tanh": lambda z: np.tanh(np.clip(2.5 * z, -60.0, 60.0)),
+    "relu": lambda z: np.maximum(z, 0.0),
+    "identity": lambda z: z,
+    "clamped": lambda z: np.clip(z, -1.0, 1.0),
+}
+
+
+class MatrixNet:
+    '''neat.nn.FeedForwardNetwork computed with one matrix product per layer
+
+    Column i of the values holds node keys[i]: the inputs first, then the
+    nodes of each layer of feed_forward_layers, and a last column of zeros
+    for the outputs no connection reaches. activate() takes (N, num_inputs)
+    inputs and returns the (N, num_outputs) outputs, the ones of
+    FeedForwardNetwork.activate on each row up to the float rounding.
+    '''
+    def __init__(self, input_keys, output_keys, keys, layers):
+        self.input_keys = input_keys
+        self.output_keys = output_keys
+        self.keys = keys
+        # (first column, weights (columns before, nodes), biases, responses, [(activation, columns)])
+        self.layers = layers
+        column = {key: i for i, key in enumerate(keys)}
+        self.outputs = [column.get(key, len(keys)) for key in output_keys]
+
+    @staticmethod
+    def create(genome, config):
+        '''return the MatrixNet of a feed forward genome, like FeedForwardNetwork.create'''
+        genome_config = config.genome_config
+        connections = [cg.key for cg in genome.connections.values() if cg.enabled]
+        keys = list(genome_config.input_keys)
+        column = {key: i for i, key in enumerate(keys)}
+        layers = []
+        for layer in feed_forward_layers(genome_config.input_keys, genome_config.output_keys, connections):
+            layer = sorted(layer)
+            first = len(keys)
+            weights = np.zeros((first, len(layer)))
+            activations = {}
+            for j, node in enumerate(layer):
+                ng = genome.nodes[node]
+                if ng.aggregation != "sum":
+                    raise ValueError("node %d aggregates with %s, only sum is supported" % (node, ng.aggregation))
+                if ng.activation not in ACTIVATIONS:
+                    raise ValueError("node %d activation %s is not supported" % (node, ng.activation))
+                activations.setdefault(ng.activation, []).append(j)
+            for inode, onode in connections:
+                if onode in layer:
+                    weights[column[inode], layer.index(onode)] += genome.connections[(inode, onode)].weight
+            biases = np.array([genome.nodes[node].bias for node in layer])
+            responses = np.array([genome.nodes[node].response for node in layer])
+            groups = [(ACTIVATIONS[name], np.array(columns)) for name, columns in activations.items()]
+            layers.append((first, weights, biases, responses, groups))
+            for node in layer:
+                column[node] = len(keys)
+                keys.append(node)
+        return MatrixNet(genome_config.input_keys, genome_config.output_keys, keys, layers)
+
+    def activate(self, inputs):
+        '''return the (N, num_outputs) outputs of (N, num_inputs) inputs'''
+        inputs = np.asarray(inputs, dtype=float)
+        if inputs.shape[1] != len(self.input_keys):
+            raise RuntimeError("Expected {0:n} inputs, got {1:n}".format(len(self.input_keys), inputs.shape[1]))
+        values = np.zeros((len(inputs), len(self.keys) + 1))
+        values[:, :len(self.input_keys)] = inputs
+        for first, weights, biases, responses, groups in self.layers:
+            z = biases + responses * (values[:, :first] @ weights)
+            for activation, columns in groups:
+                values[:, first + columns] = activation(z[:, columns])
+        return values[:, self.outputs]
+
+
+class NeatAgent:
+    '''Game.send_inputs for a batch: one network, observations from the encoder of each game'''
+    def __init__(self, net):
+        self.net = net
+
+    def observe(self, games):
+        return np.stack([game.encoder.encode(game) for game in games])
+
+    def act(self, observations):
+        # the first of the highest outputs, like send_inputs
+        return np.argmax(self.net.activate(observations), axis=1)
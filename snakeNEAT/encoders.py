@@ -0,0 +1,103 @@
+import numpy as np
+
+class Encoder:
+    '''turns a Game into the inputs of the neural network
+
+    The inputs are written in place in one vector allocated for the board
+    size, encode(game) fills and returns that same vector every time, its
+    length being num_inputs(rows). The snake must be alive, its head on the
+    board.
+    '''
+    def __init__(self, rows):
+        self.rows = rows
+        self.inputs = np.zeros(self.num_inputs(rows))
+
+
+class OneHotEncoder(Encoder):
+    '''one hot grid of the head followed by one hot grid of the food, [x, y] order'''
+    @staticmethod
+    def num_inputs(rows):
+        return 2 * rows * rows
+
+    def __init__(self, rows):
+        super().__init__(rows)
+        self.last = [0, 0]
+
+    def encode(self, game):
+        rows = self.rows
+        head = game.get_snake_head_pos()
+        food = game.get_food_pos()
+        self.inputs[self.last] = 0
+        self.last = [head[0] * rows + head[1], rows * rows + food[0] * rows + food[1]]
+        self.inputs[self.last] = 1
+        return self.inputs
+
+
+class RelativeEncoder(Encoder):
+    '''12 features whatever the board size, each group in RIGHT, LEFT, UP, DOWN order
+
+    danger: 1 if the next square in that direction is a wall or the snake
+    food: 1 if the food is further in that direction
+    dir: 1 for the direction the snake is going
+    '''
+    @staticmethod
+    def num_inputs(rows):
+        return 12
+
+    def encode(self, game):
+        snake = game.snake
+        inputs = self.inputs
+        head = snake.cells[0]
+        grid = snake.grid
+        stride = snake.stride
+        inputs[0] = grid[head + 1]
+        inputs[1] = grid[head - 1]
+        inputs[2] = grid[head - stride]
+        inputs[3] = grid[head + stride]
+
+        x, y = game.get_snake_head_pos()
+        food = game.get_food_pos()
+        inputs[4] = food[0] > x
+        inputs[5] = food[0] < x
+        inputs[6] = food[1] < y
+        inputs[7] = food[1] > y
+
+        dx, dy = game.get_snake_dir()
+        inputs[8] = dx > 0
+        inputs[9] = dx < 0
+        inputs[10] = dy < 0
+        inputs[11] = dy > 0
+        return inputs
+
+
+class GridEncoder(Encoder):
+    '''one value per square, [x, y] order: SPACE, SNAKE, HEAD or FOOD of Game'''
+    @staticmethod
+    def num_inputs(rows):
+        return rows * rows
+
+    def __init__(self, rows):
+        super().__init__(rows)
+        self.grid = self.inputs.reshape(rows, rows)
+
+    def encode(self, game):
+        np.copyto(self.grid, game.get_occupancy().T)
+        x, y = game.get_snake_head_pos()
+        self.grid[x, y] = game.HEAD
+        food = game.get_food_pos()
+        self.grid[food[0], food[1]] = game.FOOD
+        return self.inputs
+
+
+ENCODERS = {
+    "onehot": OneHotEncoder,
+    "relative": RelativeEncoder,
+    "grid": GridEncoder,
+}
+
+
+def set_num_inputs(config, encoder, rows):
+    '''make the genomes of a neat.Config take the inputs of the encoder named encoder'''
+    genome_config = config.genome_config
+    genome_config.num_inputs = ENCODERS[encoder].num_inputs(rows)
+    genome_config.input_keys = [-i - 1 for i in range(genome_config.num_inputs)]
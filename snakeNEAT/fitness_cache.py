@@ -0,0 +1,63 @@
+import hashlib
+import struct
+from collections import OrderedDict
+
+NODE = struct.Struct("<qdd")
+CONNECTION = struct.Struct("<qqd")
+
+
+def genome_hash(genome):
+    '''return a digest of what the network of genome computes
+
+    Its nodes (key, bias, response, activation, aggregation) and its enabled
+    connections (key, weight), in key order: two genomes with the same
+    digest play the same moves, whatever their id or disabled genes.
+    '''
+    digest = hashlib.blake2b(digest_size=16)
+    for key in sorted(genome.nodes):
+        node = genome.nodes[key]
+        digest.update(NODE.pack(key, node.bias, node.response))
+        digest.update(("%s/%s;" % (node.activation, node.aggregation)).encode())
+    for key in sorted(key for key, cg in genome.connections.items() if cg.enabled):
+        digest.update(CONNECTION.pack(key[0], key[1], genome.connections[key].weight))
+    return digest.digest()
+
+
+class FitnessCache:
+    '''results of the episodes already played, by genome_hash and evaluation
+
+    An evaluation is what else decides an episode: its food seed and its
+    move cap. The elites a generation carries over unchanged, or any copy
+    of a network, are not played again on the same evaluation. The capacity
+    least recently used results are kept.
+    '''
+    def __init__(self, capacity=100000):
+        self.capacity = capacity
+        self.results = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, genome, seed, max_moves):
+        return genome_hash(genome), seed, max_moves
+
+    def get(self, key):
+        '''return the result stored for key, None if there is none'''
+        result = self.results.get(key)
+        if result is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.results.move_to_end(key)
+        return result
+
+    def put(self, key, result):
+        self.results[key] = result
+        self.results.move_to_end(key)
+        if len(self.results) > self.capacity:
+            self.results.popitem(last=False)
+
+    def report(self):
+        '''return the hits and misses since the last report, and reset them'''
+        text = "Fitness cache: %d hits, %d played" % (self.hits, self.misses)
+        self.hits = self.misses = 0
+        return text
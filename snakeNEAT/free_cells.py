@@ -0,0 +1,40 @@
+import random
+
+class FreeCells:
+    '''indexable set of the free cell ids of a board
+
+    cells lists the free cell ids in no particular order and slot gives the
+    index of a cell id in cells, -1 when the cell is taken. Adding, removing
+    and picking a random free cell are all O(1).
+    '''
+    def __init__(self, size):
+        self.slot = [-1] * size
+        self.cells = []
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __contains__(self, cell):
+        return self.slot[cell] >= 0
+
+    def add(self, cell):
+        '''mark cell as free'''
+        if self.slot[cell] < 0:
+            self.slot[cell] = len(self.cells)
+            self.cells.append(cell)
+
+    def discard(self, cell):
+        '''mark cell as taken, the last free cell filling its slot'''
+        i = self.slot[cell]
+        if i >= 0:
+            last = self.cells.pop()
+            if last != cell:
+                self.cells[i] = last
+                self.slot[last] = i
+            self.slot[cell] = -1
+
+    def choice(self, rng=random):
+        '''return a random free cell, None if there is none'''
+        if not self.cells:
+            return None
+        return self.cells[rng.randrange(len(self.cells))]
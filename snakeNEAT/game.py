@@ -1,10 +1,11 @@
 import random
-import pygame
-import numpy as np
-from pygame.locals import K_LEFT, K_RIGHT, K_UP, K_DOWN
 import data.dataUtils as data
 from square import Square
 from snake import Snake
+from scheduler import Scheduler
+import profiler
+from encoders import ENCODERS
+from recorder import STOPPED
 
 class Game:
 
@@ -13,18 +14,34 @@ class Game:
     SNAKE = 1
     SPACE = 0
 
-    width = data.getConfig("width")
-    rows = data.getConfig("rows")
-    square_color = data.getConfig("squareColor")
-    initial_snake_pos = data.getConfig("initialSnakePos")
-    food_color = data.getConfig("foodColor")
-    line_color = data.getConfig("lineColor")
-    board_color = data.getConfig("boardColor")
-
-    def __init__(self):
-        '''snake game'''
-        self.snake = Snake(self.initial_snake_pos, self.square_color)
-        self.food = Square(self.random_food_pos(), self.food_color)
+    # actions, same order as FooEnv.step in snakeQ
+    RIGHT = 0
+    LEFT = 1
+    UP = 2
+    DOWN = 3
+
+    def __init__(self, config=None, headless=False, encoder="onehot", seed=None):
+        '''snake game, config being a data.Config (config.json by default)
+
+        A headless game never creates its renderer, so it runs without
+        opening a window. encoder names the encoders.ENCODERS entry that
+        builds the inputs of the neural network. seed makes the food
+        positions reproducible.
+        '''
+        self.config = config if config is not None else data.Config()
+        self.width = self.config.width
+        self.rows = self.config.rows
+        self.square_color = self.config.square_color
+        self.initial_snake_pos = self.config.initial_snake_pos
+        self.food_color = self.config.food_color
+        self.line_color = self.config.line_color
+        self.board_color = self.config.board_color
+        self.snake = Snake(self.initial_snake_pos, self.square_color, self.rows)
+        self.seeds = random.Random(seed)
+        self.reset()
+        self.headless = headless
+        self.renderer = None
+        self.encoder = ENCODERS[encoder](self.rows)
         self.size = 0
 
     def get_inputs(self):
@@ -41,7 +58,7 @@ class Game:
 
     def get_snake_full_pos(self):
         '''return array for each of the snake body pos [x, y]'''
-        return [body.pos for body in self.snake.body]
+        return [self.snake.cell_pos(cell) for cell in self.snake.cells]
 
     def get_snake_dir(self):
         '''return snake dir [x, y]'''
@@ -51,92 +68,124 @@ class Game:
         '''return food pos [x, y]'''
         return self.food.pos
 
+    def get_occupancy(self):
+        '''return the read-only [y, x] occupancy grid of the board, 1 on the snake'''
+        return self.snake.occupancy
+
     def get_score(self):
         '''return len of the snake body'''
-        return len(self.snake.body)
-
-    def draw_grid(self, surface):
-        '''draw visual of the game grid'''
-        size_between = self.width // self.rows
-        grid_x = 0
-        grid_y = 0
-        for l in range(self.rows):
-            grid_x = grid_x + size_between
-            grid_y = grid_y + size_between
-            pygame.draw.line(surface, self.line_color, (grid_x, 0), (grid_x, self.width))
-            pygame.draw.line(surface, self.line_color, (0, grid_y), (self.width, grid_y))
-
-    def redraw_window(self, surface):
+        return len(self.snake)
+
+    def get_renderer(self):
+        '''return the renderer, created on first use, None if headless'''
+        if self.renderer is None and not self.headless:
+            from renderer import Renderer
+            self.renderer = Renderer(self.config)
+        return self.renderer
+
+    def redraw_window(self):
         '''draw visual of the full game board'''
-        surface.fill(self.board_color)
-        self.snake.draw(surface)
-        self.food.draw(surface)
-        self.draw_grid(surface)
-        pygame.display.update()
+        renderer = self.get_renderer()
+        if renderer is not None:
+            renderer.draw(self)
 
     def random_food_pos(self):
-        '''return a valid random food position'''
-        positions = self.snake.body
-        while True:
-            pos = [random.randrange(self.rows), random.randrange(self.rows)]
-            if len(list(filter(lambda z: z.pos == pos, positions))) > 0:
-                continue
-            break
-        return pos
+        '''return a valid random food position, None if the board is full'''
+        cell = self.snake.free.choice(self.rng)
+        if cell is None:
+            return None
+        return self.snake.cell_pos(cell)
+
+    def reset(self, seed=None):
+        '''start a new episode, its food drawn from random.Random(seed)
+
+        Without seed, the episode seed is the next one of the game seed, so a
+        game built with a seed plays the same episodes again. episode_seed is
+        all a Recorder needs to replay the episode from its actions.
+        '''
+        prof = profiler.active
+        if prof: prof.count("episodes")
+        self.episode_seed = self.seeds.getrandbits(63) if seed is None else seed
+        self.rng = random.Random(self.episode_seed)
+        self.snake.reset(self.initial_snake_pos)
+        self.snake.alive = True
+        self.food = Square(self.random_food_pos(), self.food_color)
+        self.won = False
+
+    def eat_food(self):
+        '''grow the snake and put the food on a free square
+
+        When the snake covers the whole board there is no square left for the
+        food: the game is won and the food stays under the head.
+        '''
+        prof = profiler.active
+        if prof: prof.count("foods")
+        pos = self.random_food_pos()
+        if pos is None:
+            self.won = True
+        else:
+            self.snake.add_cube()
+            self.food = Square(pos, self.food_color)
 
     def move_snake_up(self):
-        '''Trigger one input K_UP to the snake'''
-        newevent = pygame.event.Event(pygame.KEYDOWN, unicode='', key=K_UP, mod=pygame.locals.KMOD_NONE, scancode=111, window=None)
-        newevent2 = pygame.event.Event(pygame.KEYUP, key=K_UP, mod=pygame.locals.KMOD_NONE, scancode=111, window=None)
-        pygame.event.post(newevent)
-        pygame.event.post(newevent2)
+        '''Move the snake up'''
+        self.snake.move_snake_up()
 
     def move_snake_down(self):
-        '''Trigger one input K_DOWN to the snake'''
-        newevent = pygame.event.Event(pygame.KEYDOWN, unicode='', key=K_DOWN, mod=pygame.locals.KMOD_NONE, scancode=116, window=None)
-        newevent2 = pygame.event.Event(pygame.KEYUP, key=K_DOWN, mod=pygame.locals.KMOD_NONE, scancode=116, window=None)
-        pygame.event.post(newevent)
-        pygame.event.post(newevent2)
+        '''Move the snake down'''
+        self.snake.move_snake_down()
 
     def move_snake_left(self):
-        '''Trigger one input K_LEFT to the snake'''
-        newevent = pygame.event.Event(pygame.KEYDOWN, unicode='', key=K_LEFT, mod=pygame.locals.KMOD_NONE, scancode=113, window=None)
-        newevent2 = pygame.event.Event(pygame.KEYUP, key=K_LEFT, mod=pygame.locals.KMOD_NONE, scancode=113, window=None)
-        pygame.event.post(newevent)
-        pygame.event.post(newevent2)
+        '''Move the snake left'''
+        self.snake.move_snake_left()
 
     def move_snake_right(self):
-        '''Trigger one input K_RIGHT to the snake'''
-        newevent = pygame.event.Event(pygame.KEYDOWN, unicode='', key=K_RIGHT, mod=pygame.locals.KMOD_NONE, scancode=114, window=None)
-        newevent2 = pygame.event.Event(pygame.KEYUP, key=K_RIGHT, mod=pygame.locals.KMOD_NONE, scancode=114, window=None)
-        pygame.event.post(newevent)
-        pygame.event.post(newevent2)
+        '''Move the snake right'''
+        self.snake.move_snake_right()
 
-    def send_inputs(self,net):
-        '''Envoie 200 input à notre reseau de neuronne
-        On commence par faire une matrice de taille 10x10 remplies de 0
-        On insère la position courante de la tête du snake
-        On refais la meme chose pour la position de la nourriture
-        On transforme les deux matrices en liste unidimensionnels et on les appends ensemble
-        On envoie nos 200 inputs à notre réseaux, on recois 4 ouput entre -1 et 1
-        Dépendemment des outputs, on donne un certains mouvement
-        La partie commenté au millieu est une méthode vorace qui avais beaucoup plus de succès
-        '''
-        matrixS = np.zeros((10, 10))
-        snakePos = self.get_snake_head_pos()
-        print(snakePos)
-        matrixS[snakePos[0],snakePos[1]]=1
-        inputS = np.squeeze(np.asarray(matrixS))
+    def check_food(self):
+        '''eat the food if the head is on it'''
+        if self.snake.head.pos == self.food.pos:
+            self.eat_food()
 
-        matrixF = np.zeros((10, 10))
-        foodPos = self.get_food_pos()
-        matrixF[foodPos[0],foodPos[1]]=1
-        inputF = np.squeeze(np.asarray(matrixF))
+    def step(self, action):
+        '''play one move, action being RIGHT, LEFT, UP or DOWN, and eat the food under the head'''
+        prof = profiler.active
+        if prof: t = prof.clock()
+        if action == self.RIGHT:
+            self.snake.move_snake_right()
+        elif action == self.LEFT:
+            self.snake.move_snake_left()
+        elif action == self.UP:
+            self.snake.move_snake_up()
+        else:
+            self.snake.move_snake_down()
+        if prof: t = prof.lap("move", t)
+        self.check_food()
+        if prof:
+            prof.lap("food", t)
+            prof.count("moves")
 
-        input = np.append(inputS,inputF)
+    def quit_game(self):
+        '''close the window, the game goes on headless'''
+        self.headless = True
+        if self.renderer is not None:
+            self.renderer.quit()
+            self.renderer = None
 
-        output = net.activate(input)
-        print(output)
+    def send_inputs(self,net):
+        '''Envoie les inputs de l'encodeur à notre reseau de neuronne
+        L'encodeur remplit sur place son vecteur d'inputs (voir encoders.py)
+        On envoie nos inputs à notre réseaux, on recois 4 ouput entre -1 et 1
+        Dépendemment des outputs, on retourne l'action à jouer avec step
+        La partie commenté au millieu est une méthode vorace qui avais beaucoup plus de succès
+        '''
+        prof = profiler.active
+        if prof: t = prof.clock()
+        inputs = self.encoder.encode(self)
+        if prof: t = prof.lap("encode", t)
+        output = net.activate(inputs)
+        if prof: prof.lap("activate", t)
 
         #méthode vorace
         # x = input[0]-input[4]
@@ -166,13 +215,13 @@ class Game:
         #         self.move_snake_up()
 
         if (output[0]>=output[1] and output[0]>=output[2] and output[0]>=output[3]):
-            self.move_snake_right()
+            return self.RIGHT
         elif (output[1]>=output[0] and output[1]>=output[2] and output[1]>=output[3]):
-            self.move_snake_left()
+            return self.LEFT
         elif (output[2]>=output[1] and output[2]>=output[0] and output[2]>=output[3]):
-            self.move_snake_up()
+            return self.UP
         else:
-            self.move_snake_down()
+            return self.DOWN
 
     def isCloser(self, snakeBefore, foodBefore):
         '''Regarde la position avant et après et retourne l'augmentation du fitness
@@ -192,42 +241,69 @@ class Game:
             return -2
 
 
-    def start(self, net, genome):
-        '''Main loop of the game'''
+    def judge_move(self, genome, snakeBefore, foodBefore, counter, max_moves=50):
+        '''Ajoute au fitness de genome celui du mouvement numéro counter
+        Retourne (over, stopped): la partie est finie si le snake est mort, a rempli
+        la grille ou a fait plus de max_moves mouvements (stopped)'''
+        genome.fitness += self.isCloser(snakeBefore, foodBefore)
+
+        #limite le nombre de mouvement à max_moves
+        stopped = counter>max_moves and self.snake.alive and not self.won
+        if counter>max_moves:
+            self.snake.alive=False
+
+        #si le serpent meurt ou remplit la grille
+        if self.snake.alive == False or self.won:
+            if not self.won:
+                genome.fitness -= 10
+            self.size = len(self.snake)
+            return True, stopped
+        return False, stopped
+
+    def start(self, net, genome, scheduler=None, recorder=None, max_moves=50, seed=None):
+        '''Main loop of the game, paced by scheduler (as fast as possible by default)
+
+        The genome plays one new episode of at most max_moves + 1 moves, with
+        the food seed seed if given, appended to recorder if there is one.
+        '''
+        if scheduler is None:
+            scheduler = Scheduler()
+        self.reset(seed)
+        if recorder is not None:
+            recorder.begin(self)
         self.size=0
-        win = pygame.display.set_mode((self.width, self.width))
-        clock = pygame.time.Clock()
         flag=True
         counter = 0
         while flag:
             counter+=1
-            #if statement pour limité le nombre de mouvement à 50
-            if counter>50:
-                self.snake.alive=False
-            # pygame.time.delay(50)
-            # clock.tick(10)
+            prof = profiler.active
+            if prof: t = prof.clock()
+            draw = scheduler.tick()
+            if prof: t = prof.lap("tick", t)
+            if self.renderer is not None and self.renderer.closed():
+                self.quit_game()
+            if prof: prof.lap("events", t)
 
             #les données avant un mouvement
             snakeBefore = self.get_snake_head_pos()[:]
             food = self.get_food_pos()
-            #appel send inputs qui va envoyer envoyer des inputs dans noter RN et ensuite faire un mouvement
-            self.send_inputs(net)
-            #fonction qui prend les events de deplacement et l'applique
-            self.snake.move()
-            #augmentation du fitness
-            genome.fitness += self.isCloser(snakeBefore,food)
-
-            #si le serpent a mangé une nourriture
-            if self.snake.body[0].pos == self.food.pos:
-                self.snake.add_cube()
-                self.food = Square(self.random_food_pos(), self.food_color)
-
-            #si le serpent meurt
-            if self.snake.alive == False:
-                genome.fitness -= 10
-                self.size = len(self.snake.body)
+            #send inputs envoie les inputs dans notre RN, step applique le mouvement et mange la nourriture
+            action = self.send_inputs(net)
+            self.step(action)
+            if recorder is not None:
+                recorder.record(action, self)
+            #augmentation du fitness, fin de la partie si le serpent meurt, remplit la grille ou a assez joué
+            if prof: t = prof.clock()
+            over, stopped = self.judge_move(genome, snakeBefore, food, counter, max_moves)
+            if prof: prof.lap("fitness", t)
+
+            if over:
                 print('Score:', self.size)
-                self.snake.reset(data.getConfig("initialSnakePos"))
-                self.snake.alive = True
+                if recorder is not None:
+                    recorder.end(self, STOPPED if stopped else None)
                 flag=False
-            self.redraw_window(win)
+            if draw:
+                if prof: t = prof.clock()
+                self.redraw_window()
+                if prof: prof.lap("draw", t)
+            if prof: prof.tick()
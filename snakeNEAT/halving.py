@@ -0,0 +1,81 @@
+import math
+import random
+from population import PopulationEvaluator
+
+class HalvingEvaluator(PopulationEvaluator):
+    '''successive halving: short games for every genome, long ones for the best
+
+    A generation is played in rungs. Rung 0 gives every genome one episode
+    of budget // rungs moves, then only the best 1 / eta of the genomes
+    still in go to the next rung, where each gets eta times the moves of the
+    previous rung, as longer move caps and more episodes in turn. Every
+    rung so costs at most about pop_size * budget // rungs moves, and the
+    generation pop_size * budget moves, like one episode of budget moves
+    per genome.
+
+    The fitness of an episode is scaled to an episode of budget moves
+    (fitness * budget / cap), so that episodes of different caps average
+    together: the fitness of a genome, used to rank it at each rung and
+    given to NEAT, is the mean over all its episodes. All the genomes play
+    the same seeds, drawn each generation from seed, or always the same
+    ones derived from eval_seed so the cache skips the unchanged genomes.
+    '''
+    def __init__(self, encoder="onehot", seed=None, budget=50, rungs=4, eta=2, eval_seed=None, cache=None):
+        super().__init__(encoder, seed, budget, eval_seed, cache)
+        self.budget = budget
+        self.rungs = rungs
+        self.eta = eta
+
+    def schedule(self):
+        '''return the (move cap, episodes) of each rung'''
+        moves = max(1, self.budget // self.rungs)
+        rungs = []
+        for r in range(self.rungs):
+            # the moves of a genome grow by eta per rung, first the cap, then the episodes
+            episodes = self.eta ** (r // 2)
+            rungs.append((moves * self.eta ** (r - r // 2), episodes))
+        return rungs
+
+    def evaluate(self, genomes, config):
+        genomes = [genome for genome_id, genome in genomes]
+        seeds = random.Random(self.eval_seed) if self.eval_seed is not None else self.seeds
+        # fitness sum, episodes and longest snake of each genome
+        totals = {id(genome): [0.0, 0, 0] for genome in genomes}
+        candidates = genomes
+        played = 0
+        for r, (cap, episodes) in enumerate(self.schedule()):
+            for e in range(episodes):
+                seed = seeds.getrandbits(63)
+                for genome, (fitness, size) in zip(candidates, self.episode(candidates, config, seed, cap)):
+                    total = totals[id(genome)]
+                    total[0] += fitness * self.budget / cap
+                    total[1] += 1
+                    total[2] = max(total[2], size)
+            played += len(candidates) * episodes
+            for genome in candidates:
+                total = totals[id(genome)]
+                genome.fitness = total[0] / total[1]
+            if r < self.rungs - 1:
+                keep = max(1, math.ceil(len(candidates) / self.eta))
+                candidates = sorted(candidates, key=lambda genome: genome.fitness, reverse=True)[:keep]
+        print("Longest snake length: ", max(total[2] for total in totals.values()))
+        print("Episodes played: ", played)
+        if self.cache is not None:
+            print(self.cache.report())
+
+    def episode(self, genomes, config, seed, cap):
+        '''return the (fitness, snake length) of one episode of seed and cap of each genome'''
+        results = [None] * len(genomes)
+        keys = [self.cache.key(genome, seed, cap) if self.cache is not None else None for genome in genomes]
+        missing = []
+        for i, key in enumerate(keys):
+            results[i] = self.cache.get(key) if key is not None else None
+            if results[i] is None:
+                missing.append(i)
+        if missing:
+            sizes = self.play([genomes[i] for i in missing], config, seed, cap)
+            for i, size in zip(missing, sizes):
+                results[i] = (genomes[i].fitness, size)
+                if keys[i] is not None:
+                    self.cache.put(keys[i], results[i])
+        return results
@@ -1,42 +1,153 @@
 from game import Game
-import threading
+from scheduler import Scheduler, add_arguments
+import profiler
+from recorder import Recorder
+from encoders import ENCODERS, set_num_inputs
+from population import PopulationEvaluator
+from halving import HalvingEvaluator
+from neat_checkpoint import Checkpointer, restore_last, save_winner
+from fitness_cache import FitnessCache
+import data.dataUtils as data
+import argparse
+import functools
+import multiprocessing
 import os
 import neat
 
+GENERATIONS = 40
+MAX_MOVES = 50
 
 
-def eval_genomes(genomes, config):
+def eval_genome(genome, config, game=None, scheduler=None, encoder="onehot", recorder=None, seed=None):
+    '''play one game with genome, on the food seed seed if given, and return (fitness, snake length)
 
+    Without a game, it is played in a new headless Game using encoder, which
+    is what the worker processes do.
+    '''
+    if game is None:
+        game = Game(headless=True, encoder=encoder)
+    genome.fitness = 0
+    #instantiation of the neat neural network
+    net = neat.nn.FeedForwardNetwork.create(genome, config)
+    game.start(net, genome, scheduler, recorder, MAX_MOVES, seed)
+    return genome.fitness, game.size
 
+
+def eval_genomes(genomes, config, eval_seed=None, cache=None):
+    '''evaluate the genomes one after another in the window of the global game
+
+    With an eval_seed, the genomes already in the FitnessCache cache are not played again.
+    '''
+    winnerSize = 0
     for genome_id, genome in genomes:
-        winnerSize = 0
-        genome.fitness = 0
-        #instantiation of the neat neural network
-        net = neat.nn.FeedForwardNetwork.create(genome, config)
-        #thread creation for the play of the game
-        x = threading.Thread(target=game.start(net, genome))
-        x.start()
+        key = cache.key(genome, eval_seed, MAX_MOVES) if cache is not None else None
+        result = cache.get(key) if key is not None else None
+        if result is None:
+            result = eval_genome(genome, config, game, scheduler, recorder=recorder, seed=eval_seed)
+            if key is not None:
+                cache.put(key, result)
+        genome.fitness, size = result
         #if statment to keep track of biggest snake through iterations
-        if(game.size>winnerSize):
-            winnerSize = game.size
+        if(size>winnerSize):
+            winnerSize = size
         print("Fitness: ", genome.fitness)
-        x.join()
     print("Longest snake length: ", winnerSize)
+    if cache is not None:
+        print(cache.report())
+
+
+class ParallelEvaluator:
+    '''evaluate the genomes of a generation in a pool of worker processes
+
+    Like neat.ParallelEvaluator, but eval_function returns (fitness, snake
+    length) so the longest snake of the generation is still reported. With
+    an eval_seed, the genomes already in the FitnessCache cache are not sent
+    to the workers.
+    '''
+    def __init__(self, num_workers, eval_function=eval_genome, encoder="onehot", eval_seed=None, cache=None):
+        self.eval_function = eval_function
+        self.encoder = encoder
+        self.eval_seed = eval_seed
+        self.cache = cache
+        self.pool = multiprocessing.Pool(num_workers)
 
-def run(config_file):
+    def evaluate(self, genomes, config):
+        jobs = []
+        for genome_id, genome in genomes:
+            key = self.cache.key(genome, self.eval_seed, MAX_MOVES) if self.cache is not None else None
+            result = self.cache.get(key) if key is not None else None
+            if result is None:
+                result = self.pool.apply_async(self.eval_function, (genome, config),
+                                               {"encoder": self.encoder, "seed": self.eval_seed})
+            jobs.append((key, genome, result))
+        winnerSize = 0
+        for key, genome, result in jobs:
+            if not isinstance(result, tuple):
+                result = result.get()
+                if key is not None:
+                    self.cache.put(key, result)
+            genome.fitness, size = result
+            if(size>winnerSize):
+                winnerSize = size
+        print("Longest snake length: ", winnerSize)
+        if self.cache is not None:
+            print(self.cache.report())
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+
+
+def run(config_file, num_workers, encoder="onehot", matrix=False, seed=None, checkpoint_dir=None,
+        checkpoint_every=5, restart=False, winner_path="winner.pkl", eval_seed=None, cache=None, rungs=0):
     # Load configuration.
     config = neat.Config(neat.DefaultGenome, neat.DefaultReproduction,neat.DefaultSpeciesSet, neat.DefaultStagnation,config_file)
-    # Create the population, which is the top-level object for a NEAT run.
-    p = neat.Population(config)
+    # num_inputs depends on the encoder and the size of the board
+    set_num_inputs(config, encoder, data.Config().rows)
+    # The evaluation in this process draws the food seeds from seeds, checkpointed with the population
+    if rungs:
+        evaluator = HalvingEvaluator(encoder, seed, MAX_MOVES, rungs, eval_seed=eval_seed, cache=cache)
+        seeds = evaluator.seeds
+    elif matrix:
+        evaluator = PopulationEvaluator(encoder, seed, MAX_MOVES, eval_seed, cache)
+        seeds = evaluator.seeds
+    else:
+        evaluator = None
+        seeds = game.seeds if num_workers == 1 else None
+    # Resume from the last checkpoint, or create the population, which is the top-level object for a NEAT run.
+    p = restore_last(checkpoint_dir, seeds) if checkpoint_dir is not None and not restart else None
+    if p is None:
+        p = neat.Population(config)
+        generations = GENERATIONS
+    else:
+        if p.config.genome_config.num_inputs != config.genome_config.num_inputs:
+            raise ValueError("the checkpoint has %d inputs, the %s encoder %d, use --restart"
+                             % (p.config.genome_config.num_inputs, encoder, config.genome_config.num_inputs))
+        generations = GENERATIONS - p.generation
 
     # Add a stdout reporter to show progress in the terminal.
     p.add_reporter(neat.StdOutReporter(True))
     stats = neat.StatisticsReporter()
     p.add_reporter(stats)
+    if checkpoint_dir is not None:
+        p.add_reporter(Checkpointer(checkpoint_dir, checkpoint_every, seeds))
+    if generations <= 0:
+        print("The checkpoint already ran the %d generations" % GENERATIONS)
+        return None
 
 
     # Run for up to 40 generations.
-    winner = p.run(eval_genomes, 40)
+    if evaluator is not None:
+        winner = p.run(evaluator.evaluate, generations)
+    elif num_workers > 1:
+        evaluator = ParallelEvaluator(num_workers, encoder=encoder, eval_seed=eval_seed, cache=cache)
+        winner = p.run(evaluator.evaluate, generations)
+        evaluator.close()
+    else:
+        winner = p.run(functools.partial(eval_genomes, eval_seed=eval_seed, cache=cache), generations)
+    save_winner(winner, winner_path)
+    print("Winner saved to %s" % winner_path)
+    return winner
 
 if __name__ == '__main__':
     #main()
@@ -45,6 +156,52 @@ if __name__ == '__main__':
     # current working directory.
     local_dir = os.path.dirname(__file__)
     config_path = os.path.join(local_dir, 'neat_config.txt')
+
+    parser = argparse.ArgumentParser(description="NEAT agent playing snake")
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count(),
+                        help="worker processes evaluating the genomes, 1 to play them in the game window (default %(default)s)")
+    parser.add_argument("--encoder", choices=sorted(ENCODERS), default="onehot",
+                        help="inputs of the neural network, see encoders.py (default %(default)s)")
+    parser.add_argument("--matrix", action="store_true",
+                        help="evaluate each generation at once in this process, all the networks in a few NumPy products per move (headless)")
+    parser.add_argument("--halving", type=int, default=0, metavar="RUNGS",
+                        help="successive halving in RUNGS rungs: every genome plays short games, the best half of them longer "
+                             "and more games at each rung, for the same number of moves per generation (implies --matrix)")
+    parser.add_argument("--checkpoint-dir",
+                        help="checkpoint the population in this directory and resume from its last checkpoint")
+    parser.add_argument("--checkpoint-every", type=int, default=5,
+                        help="generations between two checkpoints (default %(default)s)")
+    parser.add_argument("--restart", action="store_true",
+                        help="start a new population even if a checkpoint exists")
+    parser.add_argument("--winner", metavar="FILE",
+                        help="pickle the best genome to FILE (default winner.pkl in the checkpoint directory, else next to this script)")
+    parser.add_argument("--eval-seed", type=int,
+                        help="play every genome on this food seed, the genomes already played (elites) are then taken from a fitness cache")
+    add_arguments(parser, fps=0)
+    profiler.add_arguments(parser)
+    parser.add_argument("--seed", type=int, help="seed of the food positions, with --workers 1")
+    parser.add_argument("--record", metavar="FILE", help="append the game of every genome to FILE, with --workers 1, see replay.py")
+    parser.add_argument("--record-checkpoint-every", type=int, default=0, metavar="N",
+                        help="also record a checkpoint every N moves, checked by the replay")
+    args = parser.parse_args()
+    if args.halving < 0:
+        parser.error("--halving needs a positive number of rungs")
+    if args.halving:
+        args.matrix = True
+    if args.matrix:
+        args.workers = 1
+    if args.record and args.matrix:
+        parser.error("--record plays the genomes one after another, it cannot be used with --matrix")
+    if args.profile is not None and args.workers > 1:
+        parser.error("--profile times the game loop of this process, it needs --workers 1")
+    if (args.record or args.seed is not None) and args.workers > 1:
+        parser.error("--record and --seed play the genomes in this process, they need --workers 1")
+    scheduler = Scheduler.from_args(args)
+    profiler.enable_from_args(args)
+    recorder = Recorder(args.record, args.record_checkpoint_every) if args.record else None
     #new game
-    game = Game()
-    run(config_path)
+    game = Game(headless=scheduler.headless, encoder=args.encoder, seed=args.seed)
+    cache = FitnessCache() if args.eval_seed is not None else None
+    winner_path = args.winner or os.path.join(args.checkpoint_dir or local_dir, "winner.pkl")
+    run(config_path, args.workers, args.encoder, args.matrix, args.seed, args.checkpoint_dir,
+        args.checkpoint_every, args.restart, winner_path, args.eval_seed, cache, args.halving)
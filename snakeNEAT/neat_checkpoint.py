@@ -0,0 +1,94 @@
+import gzip
+import itertools
+import os
+import pickle
+import random
+import neat
+
+PREFIX = "neat-checkpoint-"
+
+
+class Checkpointer(neat.Checkpointer):
+    '''neat.Checkpointer writing directory/neat-checkpoint-<generation> atomically
+
+    The checkpoint is written to a temporary file then renamed, so a run
+    killed while saving leaves the previous checkpoints complete. seeds is
+    the random.Random drawing the food seeds of the evaluation, if any: its
+    state is saved too, so a resumed run plays the same games.
+    '''
+    def __init__(self, directory, generation_interval=5, seeds=None):
+        os.makedirs(directory, exist_ok=True)
+        super().__init__(generation_interval, None, os.path.join(directory, PREFIX))
+        self.seeds = seeds
+
+    def save_checkpoint(self, config, population, species_set, generation):
+        filename = "%s%d" % (self.filename_prefix, generation)
+        print("Saving checkpoint to %s" % filename)
+        tmp = filename + ".tmp"
+        with gzip.open(tmp, "w", compresslevel=5) as f:
+            seeds = self.seeds.getstate() if self.seeds is not None else None
+            pickle.dump((generation, config, population, species_set, random.getstate(), seeds), f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, filename)
+
+    @staticmethod
+    def restore_checkpoint(filename, seeds=None):
+        '''return the Population saved in filename, and set seeds to the state saved with it
+
+        The checkpoints of neat.Checkpointer, without the seeds, load too.
+        '''
+        with gzip.open(filename) as f:
+            saved = pickle.load(f)
+        generation, config, population, species_set, rndstate = saved[:5]
+        random.setstate(rndstate)
+        if seeds is not None and len(saved) > 5 and saved[5] is not None:
+            seeds.setstate(saved[5])
+        restored = neat.Population(config, (population, species_set, generation))
+        # the last genome created is the newest of the population, the next ones follow it
+        restored.reproduction.genome_indexer = itertools.count(max(population) + 1)
+        return restored
+
+
+def checkpoints(directory):
+    '''return the checkpoint files of directory, the last generation first'''
+    if not os.path.isdir(directory):
+        return []
+    generations = [int(name[len(PREFIX):]) for name in os.listdir(directory)
+                   if name.startswith(PREFIX) and name[len(PREFIX):].isdigit()]
+    return [os.path.join(directory, "%s%d" % (PREFIX, generation)) for generation in sorted(generations, reverse=True)]
+
+
+def restore_last(directory, seeds=None):
+    '''return the Population of the last checkpoint of directory that loads, None if there is none
+
+    A checkpoint that does not load is skipped for the one before it. The
+    state of seeds is set to the one saved in the checkpoint.
+    '''
+    for path in checkpoints(directory):
+        try:
+            population = Checkpointer.restore_checkpoint(path, seeds)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            continue
+        # the checkpoint of generation g is saved after the reproduction, it
+        # holds the population of generation g + 1, which neat numbers g
+        population.generation += 1
+        print("Resuming from %s" % path)
+        return population
+    return None
+
+
+def save_winner(genome, path):
+    '''pickle genome to path, through a temporary file'''
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(genome, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+
+def load_winner(path):
+    '''return the genome saved by save_winner'''
+    with open(path, "rb") as f:
+        return pickle.load(f)
@@ -0,0 +1,145 @@
+import random
+import numpy as np
+from agents import ACTIVATIONS, MatrixNet
+from game import Game
+
+class PopulationNet:
+    '''the feed forward networks of G genomes computed together
+
+    The MatrixNet of each genome is stacked on the others: every network
+    gets the same columns, the inputs, then for each depth d the columns
+    of its layer d, padded to the widest layer d of the population, then
+    one column of zeros for the outputs no connection reaches. Layer d is
+    one batched product of the (G, 1, columns before) values by (G,
+    columns before, width) weights. Padding nodes have no weight, bias or
+    response, so they stay at activation(0) and feed nothing.
+
+    The nodes share one activation, as set in neat_config.txt, so a layer
+    applies it once to all the genomes.
+    '''
+    def __init__(self, num_inputs, layers, outputs, activation):
+        self.num_inputs = num_inputs
+        # (first column, weights (G, first, width), biases (G, width), responses (G, width))
+        self.layers = layers
+        # (G, num_outputs) columns of the outputs
+        self.outputs = outputs
+        self.activation = activation
+        self.columns = layers[-1][0] + layers[-1][1].shape[2] if layers else num_inputs
+
+    @staticmethod
+    def create(genomes, config):
+        '''return the PopulationNet of a list of feed forward genomes'''
+        activation = config.genome_config.activation_default
+        if activation not in ACTIVATIONS:
+            raise ValueError("activation %s is not supported" % activation)
+        nets = [MatrixNet.create(genome, config) for genome in genomes]
+        for genome, net in zip(genomes, nets):
+            for first, weights, biases, responses, groups in net.layers:
+                if any(function is not ACTIVATIONS[activation] for function, columns in groups):
+                    raise ValueError("genome %d has nodes that are not %s, the population must all be %s"
+                                     % (genome.key, activation, activation))
+
+        num_inputs = len(config.genome_config.input_keys)
+        depth = max([len(net.layers) for net in nets] + [0])
+        widths = [max(net.layers[d][1].shape[1] for net in nets if d < len(net.layers)) for d in range(depth)]
+        firsts = [num_inputs + sum(widths[:d]) for d in range(depth)]
+        columns = num_inputs + sum(widths)
+
+        G = len(nets)
+        layers = [(first, np.zeros((G, first, width)), np.zeros((G, width)), np.zeros((G, width)))
+                  for first, width in zip(firsts, widths)]
+        outputs = np.empty((G, len(config.genome_config.output_keys)), dtype=np.int64)
+        for g, net in enumerate(nets):
+            # population column of each column of the MatrixNet, its zero column last
+            column = list(range(num_inputs))
+            for d, (first, weights, biases, responses, groups) in enumerate(net.layers):
+                width = weights.shape[1]
+                weights_d, biases_d, responses_d = layers[d][1:]
+                weights_d[g, column, :width] = weights
+                biases_d[g, :width] = biases
+                responses_d[g, :width] = responses
+                column.extend(range(firsts[d], firsts[d] + width))
+            column.append(columns)
+            outputs[g] = np.array(column)[net.outputs]
+        return PopulationNet(num_inputs, layers, outputs, ACTIVATIONS[activation])
+
+    def activate(self, inputs):
+        '''return the (G, num_outputs) outputs of the (G, num_inputs) inputs, row g for genome g'''
+        inputs = np.asarray(inputs, dtype=float)
+        values = np.zeros((len(inputs), self.columns + 1))
+        values[:, :self.num_inputs] = inputs
+        for first, weights, biases, responses in self.layers:
+            z = biases + responses * np.matmul(values[:, None, :first], weights)[:, 0, :]
+            values[:, first:first + weights.shape[2]] = self.activation(z)
+        return values[np.arange(len(inputs))[:, None], self.outputs]
+
+
+class PopulationEvaluator:
+    '''evaluate a whole generation at once, each genome on its own headless board
+
+    Every tick encodes the boards still playing, runs all the networks with
+    PopulationNet.activate and plays the first highest output of each, the
+    fitness rules being the ones of Game.start (Game.judge_move). All the
+    genomes of a generation play the same food seed, eval_seed if given,
+    else drawn from seed. The genomes whose result is in the FitnessCache
+    cache are not played again.
+    '''
+    def __init__(self, encoder="onehot", seed=None, max_moves=50, eval_seed=None, cache=None):
+        self.encoder = encoder
+        self.seeds = random.Random(seed)
+        self.max_moves = max_moves
+        self.eval_seed = eval_seed
+        self.cache = cache
+        self.games = []
+
+    def evaluate(self, genomes, config):
+        seed = self.eval_seed if self.eval_seed is not None else self.seeds.getrandbits(63)
+        sizes = []
+        played = []
+        for genome_id, genome in genomes:
+            key = self.cache.key(genome, seed, self.max_moves) if self.cache is not None else None
+            result = self.cache.get(key) if key is not None else None
+            if result is None:
+                played.append((key, genome))
+            else:
+                genome.fitness, size = result
+                sizes.append(size)
+        if played:
+            played_sizes = self.play([genome for key, genome in played], config, seed)
+            for (key, genome), size in zip(played, played_sizes):
+                if key is not None:
+                    self.cache.put(key, (genome.fitness, size))
+            sizes += played_sizes
+        print("Longest snake length: ", max(sizes))
+        if self.cache is not None:
+            print(self.cache.report())
+
+    def play(self, genomes, config, seed, max_moves=None):
+        '''play one episode of food seed with each genome, set their fitness and return the snake lengths'''
+        max_moves = self.max_moves if max_moves is None else max_moves
+        net = PopulationNet.create(genomes, config)
+        while len(self.games) < len(genomes):
+            self.games.append(Game(headless=True, encoder=self.encoder))
+        games = self.games[:len(genomes)]
+        for genome, game in zip(genomes, games):
+            genome.fitness = 0
+            game.reset(seed)
+        inputs = np.zeros((len(genomes), net.num_inputs))
+        playing = list(range(len(genomes)))
+        counter = 0
+        while playing:
+            counter += 1
+            for g in playing:
+                inputs[g] = games[g].encoder.encode(games[g])
+            actions = np.argmax(net.activate(inputs), axis=1).tolist()
+            still = []
+            for g in playing:
+                game = games[g]
+                snakeBefore = game.get_snake_head_pos()[:]
+                food = game.get_food_pos()
+                game.step(actions[g])
+                over, stopped = game.judge_move(genomes[g], snakeBefore, food, counter, max_moves)
+                if not over:
+                    still.append(g)
+            playing = still
+        return [game.size for game in games]
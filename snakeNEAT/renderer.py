@@ -0,0 +1,94 @@
+import pygame
+from pygame.locals import QUIT
+
+class Renderer:
+    '''pygame window showing a Game
+
+    This is the only place the display is created, so a Game that never
+    asks for a renderer never touches pygame.
+
+    The board color and the grid lines are drawn once in a cached background.
+    After a full draw the renderer asks the snake to log the cells it enters
+    and leaves (Snake.dirty), and the next draws only repaint and update
+    those squares and the old and new food squares. A reset of the snake
+    stops the log, which makes the next draw a full one again.
+    '''
+    def __init__(self, config):
+        self.config = config
+        self.surface = pygame.display.set_mode((config.width, config.width))
+        self.background = pygame.Surface(self.surface.get_size())
+        self.background.fill(config.board_color)
+        self.draw_grid(self.background)
+        self.food_pos = None
+
+    def square_rect(self, pos):
+        '''return the rect of one board square'''
+        dis = self.config.square_size
+        return pygame.Rect(pos[0]*dis+1, pos[1]*dis+1, dis-2, dis-2)
+
+    def draw_grid(self, surface):
+        '''draw visual of the game grid'''
+        size_between = self.config.square_size
+        width = self.config.width
+        grid_x = 0
+        grid_y = 0
+        for l in range(self.config.rows):
+            grid_x = grid_x + size_between
+            grid_y = grid_y + size_between
+            pygame.draw.line(surface, self.config.line_color, (grid_x, 0), (grid_x, width))
+            pygame.draw.line(surface, self.config.line_color, (0, grid_y), (width, grid_y))
+
+    def draw(self, game):
+        '''draw visual of the game board, only the squares that changed if possible'''
+        snake = game.snake
+        if snake.dirty is None:
+            self.draw_full(game)
+            snake.dirty = []
+            return
+
+        cells = set(snake.dirty)
+        snake.dirty.clear()
+        food = game.food
+        if food.pos != self.food_pos:
+            if self.food_pos is not None:
+                cells.add(snake.cell(self.food_pos))
+            cells.add(snake.cell(food.pos))
+            self.food_pos = list(food.pos)
+
+        rows = self.config.rows
+        occupancy = snake.occupancy
+        rects = []
+        for cell in cells:
+            x, y = snake.cell_pos(cell)
+            if x < 0 or x >= rows or y < 0 or y >= rows:
+                continue
+            rect = self.square_rect([x, y])
+            self.surface.blit(self.background, rect, rect)
+            if occupancy[y, x]:
+                pygame.draw.rect(self.surface, snake.color, rect)
+            elif [x, y] == food.pos:
+                pygame.draw.rect(self.surface, food.color, rect)
+            rects.append(rect)
+        if rects:
+            pygame.display.update(rects)
+
+    def draw_full(self, game):
+        '''draw visual of the full game board'''
+        self.surface.blit(self.background, (0, 0))
+        for square in game.snake.body:
+            pygame.draw.rect(self.surface, square.color, self.square_rect(square.pos))
+        pygame.draw.rect(self.surface, game.food.color, self.square_rect(game.food.pos))
+        self.food_pos = list(game.food.pos)
+        pygame.display.update()
+
+    def frame(self):
+        '''return a copy of the window as an [x, y, rgb] array'''
+        return pygame.surfarray.array3d(self.surface)
+
+    def closed(self):
+        '''return True if the window was closed, other events are left queued'''
+        return len(pygame.event.get(QUIT)) > 0
+
+    def quit(self):
+        pygame.display.quit()
+        pygame.quit()
@@ -1,90 +1,145 @@
-import pygame
-from pygame.locals import QUIT, K_LEFT, K_RIGHT, K_UP, K_DOWN
+import numpy as np
+from collections import deque
 from square import Square
-import data.dataUtils as data
+from free_cells import FreeCells
+import profiler
 
 class Snake:
-    '''snake entity controled by the player'''
-    body = []
-    turns = {}
+    '''snake entity controled by the player
+
+    The body is kept as a deque of packed cell ids, head on the left and tail
+    on the right, so a move is one push and one pop whatever the length.
+    Cells are numbered on the board padded with one ring of wall cells, which
+    gives a valid id to a head that just left the board. free holds the
+    board cells the body does not cover, updated as the tail leaves a cell
+    and the head enters one.
+
+    grid is a byte per padded cell, 1 for the walls and the body, so a move
+    kills the snake when the new head cell is already set. occupancy is a
+    read-only [y, x] NumPy view of the board part of grid, shared without
+    copy with the agents.
+
+    dirty logs the cells entered and left since the renderer last drew, or
+    is None when nobody is drawing the snake.
+    '''
     alive = True
-    def __init__(self, pos, color):
+    def __init__(self, pos, color, rows):
         self.color = color
-        self.head = Square(pos, color)
-        self.body.append(self.head)
-        self.dir = [0, 1]
+        self.rows = rows
+        self.stride = self.rows + 2
+        self.walls = bytes([1] * self.stride + ([1] + [0] * self.rows + [1]) * self.rows + [1] * self.stride)
+        self.grid = bytearray(self.walls)
+        board = np.frombuffer(self.grid, dtype=np.uint8).reshape(self.stride, self.stride)
+        self.occupancy = board[1:-1, 1:-1]
+        self.occupancy.flags.writeable = False
+        self.reset(pos)
+
+    def cell(self, pos):
+        '''return the packed cell id of pos [x, y]'''
+        return (pos[1] + 1) * self.stride + pos[0] + 1
+
+    def cell_pos(self, cell):
+        '''return the pos [x, y] of a packed cell id'''
+        return [cell % self.stride - 1, cell // self.stride - 1]
+
+    @property
+    def body(self):
+        '''return a Square for each body cell, head first'''
+        return [Square(self.cell_pos(cell), self.color) for cell in self.cells]
+
+    def __len__(self):
+        '''return the length of the snake, growth not yet done included'''
+        return len(self.cells) + self.growth
+
+    def move_squares(self):
+        '''pop the tail cell, unless growing, and push the new head cell
+
+        return False if the head entered a wall or the body, or if the
+        snake was already dead: it does not move again until reset
+        '''
+        if not self.alive:
+            return False
+        if self.growth:
+            self.growth -= 1
+        else:
+            tail = self.cells.pop()
+            # a wall byte is never cleared, the food could be put there
+            if not self.walls[tail]:
+                self.grid[tail] = 0
+                self.free.add(tail)
+            if self.dirty is not None:
+                self.dirty.append(tail)
+        self.head.move(self.dir[0], self.dir[1])
+        head = self.cell(self.head.pos)
+        self.cells.appendleft(head)
+        if self.dirty is not None:
+            self.dirty.append(head)
+        if self.grid[head]:
+            return False
+        self.grid[head] = 1
+        self.free.discard(head)
+        return True
 
     def move(self):
-        '''compute dir, elements to add in turns and movement of body squares'''
+        '''compute dir from the keyboard events and move the body'''
+        import pygame
+        from pygame.locals import QUIT, K_LEFT, K_RIGHT, K_UP, K_DOWN
+        prof = profiler.active
+        if prof: t = prof.clock()
         for event in pygame.event.get():
             if event.type == QUIT:
                 pygame.quit()
 
-            head_pos_key = ''.join(str(e) for e in self.head.pos[:])
-
             if event.type == pygame.KEYDOWN:
                 if event.key == K_LEFT:
                     self.dir = [-1, 0]
-                    self.turns[head_pos_key] = self.dir
                 elif event.key == K_RIGHT:
                     self.dir = [1, 0]
-                    self.turns[head_pos_key] = self.dir
                 elif event.key == K_UP:
                     self.dir = [0, -1]
-                    self.turns[head_pos_key] = self.dir
                 elif event.key == K_DOWN:
                     self.dir = [0, 1]
-                    self.turns[head_pos_key] = self.dir
-
-        for i, square in enumerate(self.body):
-            square_pos_key = ''.join(str(e) for e in square.pos[:])
-            rows = data.getConfig("rows")
-            if square.dir[0] == -1 and square.pos[0] <= 0:
-                self.alive = False
-            elif square.dir[0] == 1 and square.pos[0] >= rows-1:
-                self.alive = False
-            elif square.dir[1] == 1 and square.pos[1] >= rows-1:
-                self.alive = False
-            elif square.dir[1] == -1 and square.pos[1] <= 0:
-                self.alive = False
-            elif self.head.pos in list(map(lambda z: z.pos, self.body[1:])):
-                self.alive = False
-
-            if square_pos_key in self.turns:
-                turn = self.turns[square_pos_key]
-                square.move(turn[0], turn[1])
-                if i == len(self.body)-1:
-                    self.turns.pop(square_pos_key)
-            else:
-
-                square.move(square.dir[0], square.dir[1])
+        if prof: t = prof.lap("events", t)
+        self.alive = self.move_squares()
+        if prof: prof.lap("move", t)
+
+    def move_snake_up(self):
+        '''Move the snake up'''
+        self.dir = [0, -1]
+        self.alive = self.move_squares()
+
+    def move_snake_down(self):
+        '''Move the snake down'''
+        self.dir = [0, 1]
+        self.alive = self.move_squares()
+
+    def move_snake_left(self):
+        '''Move the snake left'''
+        self.dir = [-1, 0]
+        self.alive = self.move_squares()
+
+    def move_snake_right(self):
+        '''Move the snake right'''
+        self.dir = [1, 0]
+        self.alive = self.move_squares()
 
     def reset(self, pos):
         '''reset the snake to new default attributes'''
-        self.body = []
-        self.turns = {}
-        self.head = Square(pos, self.color)
-        self.body.append(self.head)
+        self.head = Square(list(pos), self.color)
+        self.cells = deque([self.cell(self.head.pos)])
+        self.grid[:] = self.walls
+        self.grid[self.cells[0]] = 1
+        self.free = FreeCells(self.stride * self.stride)
+        for y in range(self.rows):
+            for x in range(self.rows):
+                self.free.add(self.cell([x, y]))
+        self.free.discard(self.cells[0])
+        self.growth = 0
         self.dir = [0, 1]
+        self.alive = True
+        self.dirty = None
 
 
     def add_cube(self):
-        '''add a square to the snake tail'''
-        tail = self.body[-1]
-
-        if tail.dir[0] == 1 and tail.dir[1] == 0:
-            self.body.append(Square([tail.pos[0]-1, tail.pos[1]], self.color))
-        elif tail.dir[0] == -1 and tail.dir[1] == 0:
-            self.body.append(Square([tail.pos[0]+1, tail.pos[1]], self.color))
-        elif tail.dir[0] == 0 and tail.dir[1] == 1:
-            self.body.append(Square([tail.pos[0], tail.pos[1]-1], self.color))
-        elif tail.dir[0] == 0 and tail.dir[1] == -1:
-            self.body.append(Square([tail.pos[0], tail.pos[1]+1], self.color))
-
-        self.body[-1].dir[0] = tail.dir[0]
-        self.body[-1].dir[1] = tail.dir[1]
-
-    def draw(self, surface):
-        '''draw visual of the snake'''
-        for i, square in enumerate(self.body):
-            square.draw(surface)
+        '''grow by one square: the next move skips the tail pop'''
+        self.growth += 1
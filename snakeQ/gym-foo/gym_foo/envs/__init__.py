@@ -1 +1,2 @@
-from gym_foo.envs.foo_env import FooEnv
\ No newline at end of file
+from gym_foo.envs.foo_env import FooEnv
+from gym_foo.envs.batched_env import BatchedSnakeEnv
\ No newline at end of file
@@ -0,0 +1,29 @@
+import numpy as np
+
+class QAgent:
+    '''select_action of q_agent for a batch of FooEnv or BatchedSnakeEnv observations
+
+    q_table is the dense (num_states, num_actions) array or a SparseQTable,
+    indexer the StateIndexer of the observations. With an explore_rate, each
+    game plays a random action with that probability.
+    '''
+    def __init__(self, q_table, indexer, explore_rate=0.0, seed=None):
+        self.q_table = q_table
+        self.indexer = indexer
+        self.explore_rate = explore_rate
+        self.rng = np.random.default_rng(seed)
+
+    def observe(self, envs):
+        return np.array([env.observe() for env in envs])
+
+    def act(self, observations):
+        states = self.indexer.index_batch(np.asarray(observations))
+        if isinstance(self.q_table, np.ndarray):
+            values = self.q_table[states]
+        else:
+            values = self.q_table.get_batch(states)
+        actions = np.argmax(values, axis=1)
+        if self.explore_rate:
+            explore = self.rng.random(len(actions)) < self.explore_rate
+            actions[explore] = self.rng.integers(0, values.shape[1], int(explore.sum()))
+        return actions
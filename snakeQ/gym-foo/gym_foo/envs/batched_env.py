@@ -0,0 +1,133 @@
+import numpy as np
+import data.dataUtils as data
+
+class BatchedSnakeEnv:
+    '''N snake boards held as NumPy arrays and stepped together
+
+    The rules and the reward are the ones of FooEnv.step: the snake moves,
+    the reward is computed, then a snake whose head is on the food grows on
+    its next move.
+    Boards that are done are reset in place before step returns.
+
+    Boards are indexed [n, y, x] and a cell id is y * rows + x.
+    '''
+
+    # action -> [x, y] move, same order as FooEnv.step
+    MOVES = np.array([[1, 0], [-1, 0], [0, -1], [0, 1]], dtype=np.int64)
+
+    def __init__(self, num_envs, config=None, win_score=8, seed=None):
+        self.config = config if config is not None else data.Config()
+        self.num_envs = num_envs
+        self.rows = self.config.rows
+        self.win_score = win_score
+        self.rng = np.random.default_rng(seed)
+
+        n = num_envs
+        cells = self.rows * self.rows
+        self.index = np.arange(n)
+        self.head = np.zeros((n, 2), dtype=np.int64)
+        self.dir = np.zeros((n, 2), dtype=np.int64)
+        self.food = np.zeros((n, 2), dtype=np.int64)
+        # body ring of cell ids per board, head at head_ptr, length cells long
+        self.body = np.zeros((n, cells), dtype=np.int64)
+        self.head_ptr = np.zeros(n, dtype=np.int64)
+        self.length = np.zeros(n, dtype=np.int64)
+        self.growth = np.zeros(n, dtype=np.int64)
+        self.grid = np.zeros((n, self.rows, self.rows), dtype=np.uint8)
+        self.rel_dist = np.sqrt(2 * self.rows ** 2)
+
+        self.reset()
+
+    def get_score(self):
+        '''return the length of each snake, growth not yet done included'''
+        return self.length + self.growth
+
+    def reset(self):
+        '''reset every board and return the observations'''
+        self.reset_boards(np.ones(self.num_envs, dtype=bool))
+        return self.head.copy()
+
+    def reset_boards(self, boards):
+        '''reset the boards selected by the boolean mask boards'''
+        x, y = self.config.initial_snake_pos
+        self.grid[boards] = 0
+        self.grid[boards, y, x] = 1
+        self.head[boards] = [x, y]
+        self.dir[boards] = [0, 1]
+        self.head_ptr[boards] = 0
+        self.body[boards, 0] = y * self.rows + x
+        self.length[boards] = 1
+        self.growth[boards] = 0
+        self.place_food(boards)
+
+    def place_food(self, boards):
+        '''put the food of the selected boards on a random free cell
+
+        return a mask, over the selected boards, of the full ones: they have
+        no free cell left and their food stays where it was
+        '''
+        free = self.grid[boards].reshape(-1, self.rows * self.rows) == 0
+        keys = self.rng.random(free.shape)
+        keys[~free] = -1
+        cell = keys.argmax(axis=1)
+        full = ~free.any(axis=1)
+        selected = np.flatnonzero(boards)[~full]
+        self.food[selected, 0] = cell[~full] % self.rows
+        self.food[selected, 1] = cell[~full] // self.rows
+        return full
+
+    def step(self, actions):
+        '''apply one action per board
+
+        return observations (N, 2), rewards (N,), dones (N,) and info, where
+        info["terminal_observation"] and info["score"] are taken before the
+        finished boards are reset
+        '''
+        index = self.index
+        rows = self.rows
+        cells = rows * rows
+        grid = self.grid.reshape(self.num_envs, cells)
+
+        self.dir[:] = self.MOVES[np.asarray(actions)]
+        self.head += self.dir
+        x = self.head[:, 0]
+        y = self.head[:, 1]
+        inside = (x >= 0) & (x < rows) & (y >= 0) & (y < rows)
+
+        # the tail leaves its cell, unless the snake is growing
+        pop = self.growth == 0
+        tail = self.body[index, (self.head_ptr - self.length + 1) % cells]
+        grid[index[pop], tail[pop]] = 0
+        self.length -= pop
+        self.growth -= ~pop
+
+        # the head enters its cell, the snake dies if it is a wall or its body
+        cell = np.where(inside, y * rows + x, 0)
+        alive = inside & (grid[index, cell] == 0)
+        self.head_ptr = (self.head_ptr + 1) % cells
+        self.body[index, self.head_ptr] = cell
+        grid[index[alive], cell[alive]] = 1
+        self.length += 1
+
+        score = self.get_score()
+        food_dist = np.sqrt(((self.head - self.food) ** 2).sum(axis=1))
+        rewards = score - food_dist / self.rel_dist
+        win = score == self.win_score
+        rewards[~alive] = -1000
+        rewards[win] = 1000
+        dones = win | ~alive
+
+        # the snakes still playing eat the food under their head, a board
+        # left without a free cell for the next food is won
+        eat = ~dones & (self.head == self.food).all(axis=1)
+        if eat.any():
+            self.growth += eat
+            won = np.flatnonzero(eat)[self.place_food(eat)]
+            rewards[won] = 1000
+            dones[won] = True
+
+        info = {"terminal_observation": self.head.copy(), "score": score}
+        if dones.any():
+            self.reset_boards(dones)
+
+        return self.head.copy(), rewards, dones, info
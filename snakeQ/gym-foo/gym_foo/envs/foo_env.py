@@ -3,25 +3,43 @@ from gym import error, spaces, utils
 from gym.utils import seeding
 from game import Game
 import numpy as np
+import random
+import profiler
 
 class FooEnv(gym.Env):
-    metadata = {'render.modes': ['human']}
+    metadata = {'render.modes': ['human', 'rgb_array']}
 
-    def __init__(self):
-        self.game = Game(ai_mode=True)
+    # snake dir [x, y] -> action going that way
+    DIRS = {(1, 0): 0, (-1, 0): 1, (0, -1): 2, (0, 1): 3}
+
+    def __init__(self, config=None, headless=False, frame_scale=1, observation="head"):
+        self.game = Game(ai_mode=True, config=config, headless=headless)
 
         self.maze_size = self.game.get_game_map_size()
 
         self.action_space = spaces.Discrete(4)
 
-        # observation is the x, y coordinate of the grid
+        # "head" observation is the x, y coordinate of the grid
+        # "rich" observation is head x, y, food x, y, the action of the current
+        # dir and, for each action, 1 if the square it goes to is a wall or the snake
+        self.observation = observation
         low = np.zeros(len(self.maze_size), dtype=int)
         high = np.array(self.maze_size, dtype=int) - np.ones(len(self.maze_size), dtype=int)
+        if observation == "rich":
+            low = np.zeros(9, dtype=int)
+            high = np.concatenate([high, high, [3, 1, 1, 1, 1]])
+        elif observation != "head":
+            raise ValueError("unknown observation %r" % (observation,))
         self.observation_space = spaces.Box(low, high, dtype=np.int64)
 
+        # pixels per board square of the rgb_array frames
+        self.frame_scale = frame_scale
+
         self.game.reset()
 
     def step(self, action):
+        prof = profiler.active
+        if prof: t = prof.clock()
         if action == 0:
             # print("right")
             self.game.move_snake_right()
@@ -34,6 +52,7 @@ class FooEnv(gym.Env):
         if action == 3:
             # print("down")
             self.game.move_snake_down()
+        if prof: t = prof.lap("move", t)
 
         score = self.game.get_score()
         food_pos = self.game.get_food_pos()
@@ -41,7 +60,7 @@ class FooEnv(gym.Env):
         done = False
         reward = 0
 
-        if score == 8:
+        if score == 8 or self.game.is_won():
             reward = 1000
             done = True
         elif not self.game.is_snake_alive():
@@ -59,18 +78,60 @@ class FooEnv(gym.Env):
             )
 
             reward = score - (food_dist / rel_dist)
+            if prof: t = prof.lap("reward", t)
+
+            # eating the food on the last free square wins on this move
+            self.game.check_food()
+            if self.game.is_won():
+                reward = 1000
+                done = True
+            if prof: t = prof.lap("food", t)
 
         info = {}
 
-        return np.array(snake_pos), reward, done, info
+        obv = self.observe()
+        if prof:
+            prof.lap("observe", t)
+            prof.count("moves")
+        return obv, reward, done, info
 
-    def reset(self):
-        self.game.reset()
+    def reset(self, seed=None):
+        '''start a new episode, see Game.reset'''
+        self.game.reset(seed)
+        return self.observe()
+
+    def seed(self, seed=None):
+        '''seed the food positions of the next episodes'''
+        self.game.seeds = random.Random(seed)
+        return [seed]
+
+    def observe(self):
+        '''return the observation of the current state'''
         snake_pos = self.game.get_snake_head_pos()
-        return np.array(snake_pos)
+        if self.observation == "head":
+            return np.array(snake_pos)
+
+        snake = self.game.snake
+        if snake.alive:
+            head = snake.cells[0]
+            grid = snake.grid
+            danger = [grid[head + 1], grid[head - 1], grid[head - snake.stride], grid[head + snake.stride]]
+        else:
+            danger = [1, 1, 1, 1]
+        food_pos = self.game.get_food_pos()
+        return np.array([snake_pos[0], snake_pos[1], food_pos[0], food_pos[1],
+                         self.DIRS[tuple(self.game.get_snake_dir())]] + danger)
+
+    def render(self, mode="human", close=False, out=None):
+        '''human draws the window (Game.frame returns a copy of it)
 
-    def render(self, mode="human", close=False):
+        rgb_array draws nothing and returns the board with frame_scale pixels
+        per square, written into out when given, else a read-only view that
+        the next render overwrites: copy it to keep it
+        '''
         if close:
             self.game.quit_game()
 
-        return np.array(self.game.update())
\ No newline at end of file
+        if mode == "rgb_array":
+            return self.game.rgb_array(out, self.frame_scale)
+        self.game.update()
@@ -1,26 +1,34 @@
 import random
-import pygame
-from pygame.locals import QUIT, K_LEFT, K_RIGHT, K_UP, K_DOWN
 import data.dataUtils as data
 from square import Square
 from snake import Snake
+from scheduler import Scheduler
+from rgb_frame import RgbFrame
+import profiler
 
 class Game:
-    width = data.getConfig("width")
-    rows = data.getConfig("rows")
-    square_color = data.getConfig("squareColor")
-    initial_snake_pos = data.getConfig("initialSnakePos")
-    food_color = data.getConfig("foodColor")
-    line_color = data.getConfig("lineColor")
-    board_color = data.getConfig("boardColor")
-
-    def __init__(self, ai_mode=False):
-        '''snake game'''
-        self.snake = Snake(self.initial_snake_pos, self.square_color)
-        self.food = Square(self.random_food_pos(), self.food_color)
+    def __init__(self, ai_mode=False, config=None, headless=False, seed=None):
+        '''snake game, config being a data.Config (config.json by default)
+
+        A headless game never creates its renderer, so it runs without
+        importing pygame or opening a window. seed makes the food positions
+        reproducible.
+        '''
+        self.config = config if config is not None else data.Config()
+        self.width = self.config.width
+        self.rows = self.config.rows
+        self.square_color = self.config.square_color
+        self.initial_snake_pos = self.config.initial_snake_pos
+        self.food_color = self.config.food_color
+        self.line_color = self.config.line_color
+        self.board_color = self.config.board_color
+        self.snake = Snake(self.initial_snake_pos, self.square_color, self.rows)
+        self.seeds = random.Random(seed)
+        self.reset()
         self.ai_mode = ai_mode
-        self.surface = pygame.display.set_mode((self.width, self.width))
-        self.clock = pygame.time.Clock()
+        self.headless = headless
+        self.renderer = None
+        self.rgb_frame = None
 
     def get_game_map_rows(self):
         '''return rows config'''
@@ -35,7 +43,7 @@ class Game:
 
     def get_snake_full_pos(self):
         '''return array for each of the snake body pos [x, y]'''
-        return [body.pos for body in self.snake.body]
+        return [self.snake.cell_pos(cell) for cell in self.snake.cells]
 
     def get_snake_dir(self):
         '''return snake dir [x, y]'''
@@ -45,14 +53,22 @@ class Game:
         '''return food pos [x, y]'''
         return self.food.pos
 
+    def get_occupancy(self):
+        '''return the read-only [y, x] occupancy grid of the board, 1 on the snake'''
+        return self.snake.occupancy
+
     def get_score(self):
         '''return len of the snake body'''
-        return len(self.snake.body)
+        return len(self.snake)
 
     def is_snake_alive(self):
         '''return True if the snake is alive'''
         return self.snake.alive
 
+    def is_won(self):
+        '''return True if the snake covers the whole board'''
+        return self.won
+
     def kill_snake(self):
         '''set snake.alive to False'''
         self.snake.alive = False
@@ -73,80 +89,131 @@ class Game:
         '''Move the snake right'''
         self.snake.move_snake_right()
 
-    def draw_grid(self):
-        '''draw visual of the game grid'''
-        size_between = self.width // self.rows
-        grid_x = 0
-        grid_y = 0
-        for l in range(self.rows):
-            grid_x = grid_x + size_between
-            grid_y = grid_y + size_between
-            pygame.draw.line(self.surface, self.line_color, (grid_x, 0), (grid_x, self.width))
-            pygame.draw.line(self.surface, self.line_color, (0, grid_y), (self.width, grid_y))
+    def get_renderer(self):
+        '''return the renderer, created on first use, None if headless'''
+        if self.renderer is None and not self.headless:
+            from renderer import Renderer
+            self.renderer = Renderer(self.config)
+        return self.renderer
 
     def redraw_window(self):
         '''draw visual of the full game board'''
-        self.surface.fill(self.board_color)
-        self.snake.draw(self.surface)
-        self.food.draw(self.surface)
-        self.draw_grid()
-        pygame.display.update()
-        return pygame.surfarray.array3d(pygame.display.get_surface())
+        renderer = self.get_renderer()
+        if renderer is not None:
+            renderer.draw(self)
+
+    def frame(self):
+        '''return a copy of the window as an [x, y, rgb] array, None if headless
+
+        Copying the window costs far more than drawing it, the game loops never call it.
+        '''
+        if self.renderer is None:
+            return None
+        return self.renderer.frame()
+
+    def rgb_array(self, out=None, scale=1):
+        '''return the board as an [x, y, rgb] array of scale pixels per square, without a window
+
+        The array is out when given, else a read-only view overwritten by the
+        next call (see RgbFrame).
+        '''
+        if self.rgb_frame is None or self.rgb_frame.scale != scale:
+            self.rgb_frame = RgbFrame(self.config, scale)
+        return self.rgb_frame.render(self.snake.occupancy, self.food.pos, out)
 
     def random_food_pos(self):
-        '''return a valid random food position'''
-        positions = self.snake.body
-        while True:
-            pos = [random.randrange(self.rows), random.randrange(self.rows)]
-            if len(list(filter(lambda z: z.pos == pos, positions))) > 0:
-                continue
-            break
-        return pos
+        '''return a valid random food position, None if the board is full'''
+        cell = self.snake.free.choice(self.rng)
+        if cell is None:
+            return None
+        return self.snake.cell_pos(cell)
+
+    def eat_food(self):
+        '''grow the snake and put the food on a free square
+
+        When the snake covers the whole board there is no square left for the
+        food: the game is won and the food stays under the head.
+        '''
+        prof = profiler.active
+        if prof: prof.count("foods")
+        pos = self.random_food_pos()
+        if pos is None:
+            self.won = True
+        else:
+            self.snake.add_cube()
+            self.food = Square(pos, self.food_color)
+
+    def check_food(self):
+        '''eat the food if the head is on it'''
+        if self.snake.head.pos == self.food.pos:
+            self.eat_food()
 
     def update(self):
         '''update the game state'''
-        for event in pygame.event.get():
-            if event.type == QUIT:
-                pygame.display.quit()
-                pygame.quit()
-        if self.snake.body[0].pos == self.food.pos:
-            self.snake.add_cube()
-            self.food = Square(self.random_food_pos(), self.food_color)
-        if not self.is_snake_alive():
-            print('Score:', len(self.snake.body))
-        return self.redraw_window()
-
-    def reset(self):
-        '''reset the game'''
-        self.snake.reset(data.getConfig("initialSnakePos"))
-        self.food = Square(self.random_food_pos(), self.food_color)
+        prof = profiler.active
+        if prof: t = prof.clock()
+        if self.renderer is not None and self.renderer.closed():
+            self.quit_game()
+        if prof: t = prof.lap("events", t)
+        self.check_food()
+        if prof: t = prof.lap("update food", t)
+        if not self.is_snake_alive() or self.won:
+            print('Score:', len(self.snake))
+        self.redraw_window()
+        if prof: prof.lap("draw", t)
+
+    def reset(self, seed=None):
+        '''start a new episode, its food drawn from random.Random(seed)
+
+        Without seed, the episode seed is the next one of the game seed, so a
+        game built with a seed plays the same episodes again. episode_seed is
+        all a Recorder needs to replay the episode from its actions.
+        '''
+        prof = profiler.active
+        if prof: prof.count("episodes")
+        self.episode_seed = self.seeds.getrandbits(63) if seed is None else seed
+        self.rng = random.Random(self.episode_seed)
+        self.snake.reset(self.initial_snake_pos)
         self.snake.alive = True
+        self.food = Square(self.random_food_pos(), self.food_color)
+        self.won = False
 
     def quit_game(self):
-        pygame.display.quit()
-        pygame.quit()
-
-    def start(self):
-        '''Main loop of the game'''
+        '''close the window, the game goes on headless'''
+        self.headless = True
+        if self.renderer is not None:
+            self.renderer.quit()
+            self.renderer = None
+
+    def start(self, scheduler=None):
+        '''Main loop of the game, paced by scheduler (10 ticks per second by default)'''
+        if scheduler is None:
+            scheduler = Scheduler(fps=10)
+        renderer = self.get_renderer()
         while True:
+            prof = profiler.active
+            if prof: t = prof.clock()
+            draw = scheduler.tick()
+            if prof: prof.lap("tick", t)
 
-            for event in pygame.event.get():
-                if event.type == QUIT:
-                    pygame.quit()
-                    break
+            if renderer is not None and renderer.closed():
+                self.quit_game()
+                break
 
             if not self.ai_mode:
-                pygame.time.delay(100)
-                self.clock.tick(10)
                 self.snake.move()
-                
-            if self.snake.body[0].pos == self.food.pos:
-                self.snake.add_cube()
-                self.food = Square(self.random_food_pos(), self.food_color)
-
-            if not self.is_snake_alive():
-                print('Score:', len(self.snake.body))
-                self.snake.reset(data.getConfig("initialSnakePos"))
-                self.snake.alive = True
+                if prof: prof.count("moves")
+
+            if prof: t = prof.clock()
+            self.check_food()
+            if prof: prof.lap("food", t)
+
+            if not self.is_snake_alive() or self.won:
+                print('Score:', len(self.snake))
+                self.reset()
                 break
-            self.redraw_window()
+            if draw:
+                if prof: t = prof.clock()
+                self.redraw_window()
+                if prof: prof.lap("draw", t)
+            if prof: prof.tick()
@@ -1,9 +1,21 @@
 from game import Game
+from scheduler import Scheduler, add_arguments
+import profiler
+import argparse
 import threading
 
 def main():
-    game = Game()
-    x = threading.Thread(target=game.start)
+    parser = argparse.ArgumentParser(description="snake game")
+    add_arguments(parser, fps=10)
+    profiler.add_arguments(parser)
+    args = parser.parse_args()
+    scheduler = Scheduler.from_args(args)
+    if scheduler.headless:
+        # the snake is moved with the keyboard, which needs the window
+        parser.error("--render-every 0 has no window to play in, use a value of 1 or more")
+    profiler.enable_from_args(args)
+    game = Game(headless=scheduler.headless)
+    x = threading.Thread(target=game.start, args=(scheduler,))
     x.start()
     x.join()
 
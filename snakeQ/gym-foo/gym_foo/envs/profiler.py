@@ -0,0 +1,97 @@
+import atexit
+import sys
+import time
+
+class Profiler:
+    '''per-phase timers and counters of the game loops
+
+    A loop times its phases with lap(): each call records the time since
+    the previous one under a phase name, in a histogram of power of 2
+    nanoseconds. The phases must not overlap, an outer phase would count the
+    time of its inner ones again in the share of the total. count() adds
+    to a counter, such as the moves or the foods eaten. tick() ends one
+    loop iteration and prints the summary every dump_every ticks.
+
+    Profiling is off unless enable() was called: the instrumented code reads
+    the module attribute active and only calls the profiler when it is not
+    None, so it costs one test per phase when off.
+    '''
+    def __init__(self, dump_every=0, stream=None):
+        self.dump_every = dump_every
+        self.stream = stream if stream is not None else sys.stderr
+        self.clock = time.perf_counter_ns
+        self.ticks = 0
+        self.phases = {}
+        self.counters = {}
+
+    def lap(self, name, start):
+        '''record the time since start under the phase name and return now'''
+        now = self.clock()
+        ns = now - start
+        phase = self.phases.get(name)
+        if phase is None:
+            # calls, total ns, max ns, histogram by bit length of ns
+            phase = self.phases[name] = [0, 0, 0, [0] * 64]
+        phase[0] += 1
+        phase[1] += ns
+        if ns > phase[2]:
+            phase[2] = ns
+        phase[3][ns.bit_length()] += 1
+        return now
+
+    def count(self, name, n=1):
+        '''add n to the counter name'''
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def tick(self):
+        '''end one loop iteration, print the summary every dump_every ticks'''
+        self.ticks += 1
+        if self.dump_every and self.ticks % self.dump_every == 0:
+            self.dump()
+
+    def dump(self):
+        '''print the phases and counters recorded since the start'''
+        total = sum(phase[1] for phase in self.phases.values()) or 1
+        lines = ["profile after %d ticks" % self.ticks,
+                 "%-14s %10s %10s %6s %9s %9s %9s %9s" % ("phase", "calls", "total ms", "share", "mean us", "~p50 us", "~p99 us", "max us")]
+        for name, (calls, ns, worst, histogram) in sorted(self.phases.items(), key=lambda item: -item[1][1]):
+            lines.append("%-14s %10d %10.1f %5.1f%% %9.2f %9.2f %9.2f %9.2f"
+                         % (name, calls, ns / 1e6, 100.0 * ns / total, ns / calls / 1e3,
+                            percentile(histogram, calls, 0.5) / 1e3, percentile(histogram, calls, 0.99) / 1e3, worst / 1e3))
+        for name, n in sorted(self.counters.items()):
+            lines.append("%-14s %10d" % (name, n))
+        print("\n".join(lines), file=self.stream)
+
+
+def percentile(histogram, calls, q):
+    '''return the upper bound in ns of the histogram bucket holding the q quantile'''
+    rank = q * calls
+    seen = 0
+    for bits, n in enumerate(histogram):
+        seen += n
+        if seen >= rank:
+            return 1 << bits
+    return 1 << (len(histogram) - 1)
+
+
+# the enabled Profiler, None when profiling is off
+active = None
+
+def enable(dump_every=0, stream=None):
+    '''turn profiling on, the summary is also printed when the program exits'''
+    global active
+    active = Profiler(dump_every, stream)
+    atexit.register(active.dump)
+    return active
+
+
+def add_arguments(parser):
+    '''add the --profile option to an argparse parser'''
+    parser.add_argument("--profile", type=int, default=None, metavar="N",
+                        help="time the phases of the game loop and print them every N ticks, 0 only at exit")
+
+
+def enable_from_args(args):
+    '''enable profiling if --profile was given'''
+    if args.profile is not None:
+        enable(args.profile)
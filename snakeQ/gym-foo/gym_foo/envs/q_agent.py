@@ -4,26 +4,37 @@ import math
 import numpy as np
 import sys
 import random
-import time
+import argparse
+from scheduler import Scheduler, add_arguments
+from state_indexer import StateIndexer
+from q_checkpoint import QTableCheckpoint
+from sparse_q_table import SparseQTable
+from replay_buffer import ReplayBuffer
+import profiler
+from recorder import Recorder
 
 def simulate():
 
-    # Instantiating the learning related parameters
-    learning_rate = get_learning_rate(0)
-    explore_rate = get_explore_rate(0)
+    # Instantiating the learning related parameters, or resuming them
+    learning_rate = RUN_STATE.get("learning_rate", get_learning_rate(0))
+    explore_rate = RUN_STATE.get("explore_rate", get_explore_rate(0))
     discount_factor = 0.99
 
-    num_streaks = 0
+    num_streaks = RUN_STATE.get("num_streaks", 0)
+    first_episode = RUN_STATE.get("episode", 0)
 
     # Render the map
-    env.render()
+    if not SCHEDULER.headless:
+        env.render()
 
     reward_map = np.zeros(0)
 
-    for episode in range(NUM_EPISODES):
+    for episode in range(first_episode, NUM_EPISODES):
 
         # Reset the environment
         obv = env.reset()
+        if RECORDER is not None:
+            RECORDER.begin(env.game)
 
         # the initial state
         state_0 = state_to_bucket(obv)
@@ -31,28 +42,47 @@ def simulate():
 
         for t in range(MAX_T):
 
+            # Time the phases of the step if profiling, env.step times its own
+            prof = profiler.active
+            if prof: now = prof.clock()
+
             # Select an action
             action = select_action(state_0, explore_rate)
+            if prof: now = prof.lap("select", now)
 
-            time.sleep(0.01)
+            draw = SCHEDULER.tick()
+            if prof: prof.lap("tick", now)
 
             # execute the action
             obv, reward, done, _ = env.step(action)
+            if RECORDER is not None:
+                RECORDER.record(action, env.game)
 
             # Observe the result
+            if prof: now = prof.clock()
             state = state_to_bucket(obv)
             total_reward += reward
+            if prof: now = prof.lap("index", now)
 
             # Update the Q based on the result
             best_q = np.amax(q_table[state])
-            q_table[state_0 + (action,)] += learning_rate * (reward + discount_factor * (best_q) - q_table[state_0 + (action,)])
+            q_table[state_0, action] += learning_rate * (reward + discount_factor * (best_q) - q_table[state_0, action])
+            if prof: now = prof.lap("update", now)
+
+            # Learn again from a minibatch of past transitions
+            if REPLAY is not None:
+                REPLAY.add(state_0, action, reward, state, done)
+                if len(REPLAY) >= REPLAY_BATCH:
+                    replay_update(learning_rate, discount_factor)
+                if prof: now = prof.lap("replay", now)
 
             # Setting up for the next iteration
             state_0 = state
 
-            # Render the maze
-            if RENDER_MAP:
+            # Render the maze, Game.update times its own phases
+            if draw:
                 env.render()
+            if prof: prof.tick()
 
             if done:
                 print("Episode %d finished after %f time steps with total reward = %f (streak %d) (score: %d)."
@@ -62,20 +92,54 @@ def simulate():
                     num_streaks += 1
                 else:
                     num_streaks = 0
+                if RECORDER is not None:
+                    RECORDER.end(env.game)
                 break
 
             elif t >= MAX_T - 1:
                 print("Episode %d timed out at %d with total reward = %f (score %d)."
                       % (episode, t, total_reward, env.game.get_score()))
+                if RECORDER is not None:
+                    RECORDER.end(env.game)
 
         # It's considered done when it's solved over 120 times consecutively
         if num_streaks > STREAK_TO_END:
+            save_checkpoint(episode + 1, explore_rate, learning_rate, num_streaks)
             break
 
         # Update parameters
         explore_rate = get_explore_rate(episode)
         learning_rate = get_learning_rate(episode)
 
+        if CHECKPOINT is not None and ((episode + 1) % CHECKPOINT_EVERY == 0 or episode == NUM_EPISODES - 1):
+            save_checkpoint(episode + 1, explore_rate, learning_rate, num_streaks)
+
+def save_checkpoint(episode, explore_rate, learning_rate, num_streaks):
+    # Save the Q-Table and where to resume from, episode being the next one
+    if CHECKPOINT is not None:
+        CHECKPOINT.save(q_table, {"episode": episode, "explore_rate": explore_rate,
+                                  "learning_rate": learning_rate, "num_streaks": num_streaks})
+
+def replay_update(learning_rate, discount_factor):
+    # One batched Q update from transitions sampled in the replay buffer,
+    # the update of a (state, action) pair drawn k times is averaged over them
+    indices, states, actions, rewards, next_states, dones = REPLAY.sample(REPLAY_BATCH)
+    if isinstance(q_table, SparseQTable):
+        best_q = q_table.get_batch(next_states).max(axis=1)
+        q = q_table.get_batch(states)[np.arange(len(states)), actions]
+    else:
+        best_q = q_table[next_states].max(axis=1)
+        q = q_table[states, actions]
+    td_errors = rewards + discount_factor * best_q * ~dones - q
+
+    _, inverse, counts = np.unique(states * NUM_ACTIONS + actions, return_inverse=True, return_counts=True)
+    deltas = learning_rate * td_errors / counts[inverse]
+    if isinstance(q_table, SparseQTable):
+        q_table.add_batch(states, actions, deltas)
+    else:
+        np.add.at(q_table, (states, actions), deltas)
+    REPLAY.update_priorities(indices, td_errors)
+
 def select_action(state, explore_rate):
     # Select a random action
     if random.random() < explore_rate:
@@ -95,26 +159,56 @@ def get_learning_rate(t):
 
 
 def state_to_bucket(state):
-    bucket_indice = []
-    for i in range(len(state)):
-        if state[i] <= STATE_BOUNDS[i][0]:
-            bucket_index = 0
-        elif state[i] >= STATE_BOUNDS[i][1]:
-            bucket_index = NUM_BUCKETS[i] - 1
-        else:
-            # Mapping the state bounds to the bucket array
-            bound_width = STATE_BOUNDS[i][1] - STATE_BOUNDS[i][0]
-            offset = (NUM_BUCKETS[i]-1)*STATE_BOUNDS[i][0]/bound_width
-            scaling = (NUM_BUCKETS[i]-1)/bound_width
-            bucket_index = int(round(scaling*state[i] - offset))
-        bucket_indice.append(bucket_index)
-    return tuple(bucket_indice)
+    return STATE_INDEXER.index(state)
 
 
 if __name__ == "__main__":
 
+    # Pace of the training and how often the game is drawn, e.g.
+    # --fps 0 --render-every 0 trains headless as fast as possible
+    parser = argparse.ArgumentParser(description="Q-learning agent playing snake")
+    add_arguments(parser, fps=100)
+    profiler.add_arguments(parser)
+    parser.add_argument("--checkpoint-dir",
+                        help="keep the Q-Table memory mapped in this directory, checkpoint it and resume from it")
+    parser.add_argument("--checkpoint-every", type=int, default=10,
+                        help="episodes between two checkpoints (default %(default)s)")
+    parser.add_argument("--restart", action="store_true",
+                        help="start from an empty Q-Table even if a checkpoint exists")
+    parser.add_argument("--observation", choices=["head", "rich"], default="head",
+                        help="state seen by the agent, see FooEnv (default %(default)s)")
+    parser.add_argument("--sparse-capacity", type=int, default=0,
+                        help="keep at most N states in a sparse Q-Table, 0 for a dense one (default %(default)s)")
+    parser.add_argument("--eviction", choices=["lru", "visits"], default="lru",
+                        help="states dropped from a full sparse Q-Table (default %(default)s)")
+    parser.add_argument("--replay-capacity", type=int, default=0,
+                        help="replay the last N transitions, 0 to learn from each transition once (default %(default)s)")
+    parser.add_argument("--replay-batch", type=int, default=32,
+                        help="transitions replayed after each step (default %(default)s)")
+    parser.add_argument("--prioritized", action="store_true",
+                        help="replay the transitions with a large TD error more often")
+    parser.add_argument("--seed", type=int, help="seed of the food positions and of the exploration")
+    parser.add_argument("--record", metavar="FILE", help="append every episode to FILE, see replay.py")
+    parser.add_argument("--record-checkpoint-every", type=int, default=0, metavar="N",
+                        help="also record a checkpoint every N moves, checked by the replay")
+    args = parser.parse_args()
+    if args.checkpoint_every < 1:
+        parser.error("--checkpoint-every needs at least 1 episode")
+    if args.sparse_capacity and args.checkpoint_dir is not None:
+        parser.error("--checkpoint-dir needs a dense Q-Table")
+    if args.sparse_capacity and args.replay_capacity and args.replay_batch > args.sparse_capacity:
+        parser.error("--replay-batch cannot be larger than --sparse-capacity")
+    SCHEDULER = Scheduler.from_args(args)
+    profiler.enable_from_args(args)
+    CHECKPOINT_EVERY = args.checkpoint_every
+
     # Initialize the "snake" environment
-    env = gym.make('foo-v0')
+    env = gym.make('foo-v0', headless=SCHEDULER.headless, observation=args.observation)
+    if args.seed is not None:
+        random.seed(args.seed)
+        env.seed(args.seed)
+        env.action_space.seed(args.seed)
+    RECORDER = Recorder(args.record, args.record_checkpoint_every) if args.record else None
 
     '''
     Defining the environment related constants
@@ -126,15 +220,15 @@ if __name__ == "__main__":
 
     # Number of discrete actions
     NUM_ACTIONS = env.action_space.n  # ["Right", "Left", "Down", "Up"]
-    # Bounds for each discrete state
-    STATE_BOUNDS = list(zip(env.observation_space.low, env.observation_space.high))
+    # Bounds for each discrete state, looked up as a flat index of the Q-Table
+    STATE_INDEXER = StateIndexer(env.observation_space.low, env.observation_space.high, NUM_BUCKETS)
 
     '''
     Learning related constants
     '''
     MIN_EXPLORE_RATE = 0.001
     MIN_LEARNING_RATE = 0.4
-    DECAY_FACTOR = np.prod(MAP_SIZE, dtype=float) / 10.0
+    DECAY_FACTOR = np.prod(env.game.get_game_map_size(), dtype=float) / 10.0
 
     '''
     Defining the simulation related constants
@@ -143,11 +237,27 @@ if __name__ == "__main__":
     MAX_T = 100
     STREAK_TO_END = 5
     SOLVED_T = 80
-    RENDER_MAP = True
 
     '''
     Creating a Q-Table for each state-action pair
     '''
-    q_table = np.zeros(NUM_BUCKETS + (NUM_ACTIONS,), dtype=float)
+    if args.sparse_capacity:
+        # the flat state index is the packed id of the state
+        CHECKPOINT = None
+        q_table = SparseQTable(NUM_ACTIONS, args.sparse_capacity, args.eviction)
+        RUN_STATE = {}
+    elif args.checkpoint_dir is None:
+        CHECKPOINT = None
+        q_table = np.zeros((STATE_INDEXER.num_states, NUM_ACTIONS), dtype=float)
+        RUN_STATE = {}
+    else:
+        CHECKPOINT = QTableCheckpoint(args.checkpoint_dir)
+        q_table, RUN_STATE = CHECKPOINT.open((STATE_INDEXER.num_states, NUM_ACTIONS), resume=not args.restart)
+
+    '''
+    Replay buffer of the past transitions
+    '''
+    REPLAY_BATCH = args.replay_batch
+    REPLAY = ReplayBuffer(args.replay_capacity, args.prioritized) if args.replay_capacity else None
 
     simulate()
@@ -0,0 +1,86 @@
+import json
+import os
+import numpy as np
+
+class QTableCheckpoint:
+    '''Q-table kept in a memory mapped .npy file, with atomic checkpoints
+
+    In directory, name.live.npy is the table being trained and name.json the
+    run metadata (episode, rates, streak...) of the last checkpoint, with
+    the file of its table, name.<version>.npy. A checkpoint writes the table
+    under the next version, then renames the new name.json over the previous
+    one: that rename is the only commit point, so a crash at any time leaves
+    name.json naming a complete table saved with it. The tables of older
+    checkpoints are then removed, processes that mapped one keep reading it.
+    '''
+    def __init__(self, directory, name="q_table"):
+        self.directory = directory
+        self.name = name
+        self.meta_path = os.path.join(directory, name + ".json")
+        self.live_path = os.path.join(directory, name + ".live.npy")
+
+    def open(self, shape, resume=True):
+        '''return the live table and the metadata of the checkpoint it starts from
+
+        The table starts from the last checkpoint if resume is True and one of
+        this shape exists, else from zeros with empty metadata.
+        '''
+        os.makedirs(self.directory, exist_ok=True)
+        q_table = np.lib.format.open_memmap(self.live_path, mode="w+", dtype=float, shape=tuple(shape))
+        metadata = self.load_metadata() if resume else None
+        if metadata is not None and tuple(metadata["shape"]) == q_table.shape:
+            q_table[:] = np.load(os.path.join(self.directory, metadata["table"]), mmap_mode="r")
+            return q_table, metadata
+        return q_table, {}
+
+    def load_metadata(self):
+        '''return the metadata of the last checkpoint, None if there is none'''
+        if not os.path.exists(self.meta_path):
+            return None
+        with open(self.meta_path) as f:
+            metadata = json.load(f)
+        if "table" not in metadata or not os.path.exists(os.path.join(self.directory, metadata["table"])):
+            return None
+        return metadata
+
+    def versions(self):
+        '''return the versions of the table files in directory'''
+        prefix = self.name + "."
+        versions = []
+        for name in os.listdir(self.directory):
+            version = name[len(prefix):-len(".npy")]
+            if name.startswith(prefix) and name.endswith(".npy") and version.isdigit():
+                versions.append(int(version))
+        return versions
+
+    def save(self, q_table, metadata):
+        '''checkpoint q_table and the metadata dict'''
+        versions = self.versions()
+        table = "%s.%d.npy" % (self.name, max(versions + [0]) + 1)
+        metadata = dict(metadata, shape=list(q_table.shape), table=table)
+        path = os.path.join(self.directory, table)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, q_table)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+        tmp = self.meta_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(metadata, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.meta_path)
+
+        # name.json no longer names the tables of the older checkpoints
+        for version in versions:
+            os.remove(os.path.join(self.directory, "%s.%d.npy" % (self.name, version)))
+
+
+def load_q_table(directory, name="q_table"):
+    '''return the last checkpointed table as a read-only memory map, nothing is copied'''
+    metadata = QTableCheckpoint(directory, name).load_metadata()
+    if metadata is None:
+        raise FileNotFoundError("no checkpoint of %s in %s" % (name, directory))
+    return np.load(os.path.join(directory, metadata["table"]), mmap_mode="r")
@@ -0,0 +1,29 @@
+from foo_env import FooEnv
+from scheduler import Scheduler, add_arguments
+from recorder import read_episodes, replay
+import argparse
+import time
+
+def main():
+    parser = argparse.ArgumentParser(description="play again the episodes recorded with --record")
+    parser.add_argument("file", help="file written with --record")
+    parser.add_argument("--episode", type=int, action="append",
+                        help="index of an episode to replay, all of them by default, can be repeated")
+    add_arguments(parser, fps=0, render_every=0)
+    args = parser.parse_args()
+    scheduler = Scheduler.from_args(args)
+    env = FooEnv(headless=scheduler.headless)
+
+    start = time.perf_counter()
+    moves = 0
+    for index, episode in enumerate(read_episodes(args.file)):
+        if args.episode and index not in args.episode:
+            continue
+        # the moves go through FooEnv.step, which only eats while the episode is not done
+        replay(env.game, episode, step=env.step, scheduler=None if scheduler.headless else scheduler)
+        moves += len(episode.actions)
+        print("Episode %d: seed %d, %d moves, score %d" % (index, episode.seed, len(episode.actions), episode.score))
+    seconds = time.perf_counter() - start
+    print("%d moves replayed in %.2f s" % (moves, seconds))
+
+main()
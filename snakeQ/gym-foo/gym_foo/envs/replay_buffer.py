@@ -0,0 +1,57 @@
+import numpy as np
+
+class ReplayBuffer:
+    '''ring buffer of the last capacity transitions (state, action, reward, next_state, done)
+
+    Each field is a preallocated NumPy column, states being the integer
+    state indices of the Q-table, so add() is O(1) and the memory does not
+    grow with training. sample() draws uniformly, or, if prioritized, with
+    probability priority ** alpha where the priority of a transition is the
+    last absolute TD error given to update_priorities (new transitions get
+    the highest priority so far).
+    '''
+    def __init__(self, capacity, prioritized=False, alpha=0.6, seed=None):
+        self.capacity = capacity
+        self.prioritized = prioritized
+        self.alpha = alpha
+        self.rng = np.random.default_rng(seed)
+        self.states = np.zeros(capacity, dtype=np.int64)
+        self.actions = np.zeros(capacity, dtype=np.int64)
+        self.rewards = np.zeros(capacity)
+        self.next_states = np.zeros(capacity, dtype=np.int64)
+        self.dones = np.zeros(capacity, dtype=bool)
+        self.priorities = np.zeros(capacity)
+        self.max_priority = 1.0
+        self.next = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def add(self, state, action, reward, next_state, done):
+        '''store a transition over the oldest one if the buffer is full'''
+        i = self.next
+        self.states[i] = state
+        self.actions[i] = action
+        self.rewards[i] = reward
+        self.next_states[i] = next_state
+        self.dones[i] = done
+        self.priorities[i] = self.max_priority
+        self.next = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def sample(self, batch_size):
+        '''return indices, states, actions, rewards, next_states, dones of batch_size transitions'''
+        if self.prioritized:
+            weights = self.priorities[:self.size] ** self.alpha
+            indices = self.rng.choice(self.size, batch_size, p=weights / weights.sum())
+        else:
+            indices = self.rng.integers(0, self.size, batch_size)
+        return (indices, self.states[indices], self.actions[indices], self.rewards[indices],
+                self.next_states[indices], self.dones[indices])
+
+    def update_priorities(self, indices, td_errors):
+        '''set the priorities of the sampled transitions from their TD errors'''
+        priorities = np.abs(td_errors) + 1e-6
+        self.priorities[indices] = priorities
+        self.max_priority = max(self.max_priority, float(priorities.max()))
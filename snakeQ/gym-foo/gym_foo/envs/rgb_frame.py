@@ -0,0 +1,38 @@
+import numpy as np
+
+class RgbFrame:
+    '''[x, y, rgb] picture of the board built from the occupancy grid
+
+    Each board square is scale x scale pixels, so scale=1 gives a
+    rows x rows x 3 frame. The grid lines are not drawn and pygame is not
+    needed. Every buffer is allocated once: render() fills the caller's out
+    array, or returns a read-only view of the frame's own buffer, which the
+    next render() overwrites.
+    '''
+    def __init__(self, config, scale=1):
+        self.rows = config.rows
+        self.scale = scale
+        self.shape = (self.rows * scale, self.rows * scale, 3)
+        self.palette = np.array([config.board_color, config.square_color, config.food_color], dtype=np.uint8)
+        self.codes = np.zeros((self.rows, self.rows), dtype=np.uint8)
+        self.small = np.zeros((self.rows, self.rows, 3), dtype=np.uint8)
+        self.buffer = np.zeros(self.shape, dtype=np.uint8)
+        self.view = self.buffer.view()
+        self.view.flags.writeable = False
+
+    def render(self, occupancy, food_pos, out=None):
+        '''draw the [y, x] occupancy grid and the food into out, or into the own buffer'''
+        if out is not None and (out.shape != self.shape or out.dtype != np.uint8 or not out.flags.c_contiguous):
+            raise ValueError("out must be a C-contiguous uint8 array of shape %s" % (self.shape,))
+        target = self.buffer if out is None else out
+
+        np.copyto(self.codes, occupancy.T)
+        self.codes[food_pos[0], food_pos[1]] = 2
+        if self.scale == 1:
+            np.take(self.palette, self.codes, axis=0, out=target)
+        else:
+            np.take(self.palette, self.codes, axis=0, out=self.small)
+            k = self.scale
+            target.reshape(self.rows, k, self.rows, k, 3)[...] = self.small[:, None, :, None, :]
+
+        return self.view if out is None else out
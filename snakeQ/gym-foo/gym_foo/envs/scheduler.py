@@ -0,0 +1,46 @@
+import time
+
+class Scheduler:
+    '''paces a game loop and tells it which ticks to draw
+
+    fps > 0 is real time: tick() waits so the loop runs at fps ticks per
+    second, for humans watching. fps = 0 is fast-forward: tick() never
+    waits. One tick out of render_every is drawn, render_every = 0 never
+    draws, so the game can run headless.
+    '''
+    def __init__(self, fps=0, render_every=1):
+        self.fps = fps
+        self.render_every = render_every
+        self.period = 1.0 / fps if fps > 0 else 0.0
+        self.ticks = 0
+        self.next_time = None
+
+    @classmethod
+    def from_args(cls, args):
+        '''return the scheduler asked for by the add_arguments options'''
+        return cls(args.fps, args.render_every)
+
+    @property
+    def headless(self):
+        '''return True if no tick is ever drawn'''
+        return self.render_every == 0
+
+    def tick(self):
+        '''wait for the next tick in real time, return True if it should be drawn'''
+        self.ticks += 1
+        if self.period:
+            now = time.perf_counter()
+            if self.next_time is None or self.next_time < now:
+                self.next_time = now
+            else:
+                time.sleep(self.next_time - now)
+            self.next_time += self.period
+        return self.render_every > 0 and self.ticks % self.render_every == 0
+
+
+def add_arguments(parser, fps, render_every=1):
+    '''add the --fps and --render-every options of Scheduler to an argparse parser'''
+    parser.add_argument("--fps", type=float, default=fps,
+                        help="ticks per second, 0 to run as fast as possible (default %(default)s)")
+    parser.add_argument("--render-every", type=int, default=render_every,
+                        help="draw one tick out of N, 0 to run headless (default %(default)s)")
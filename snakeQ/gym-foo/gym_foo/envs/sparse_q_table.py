@@ -0,0 +1,117 @@
+import numpy as np
+
+class SparseQTable:
+    '''Q-table holding at most capacity states, keyed by packed integer state ids
+
+    Drop-in for the dense q_table of q_agent: q_table[state] is the row of
+    action values of a state (zeros, read-only, for a state never updated)
+    and q_table[state, action] can be read and assigned.
+
+    The rows live in one preallocated (capacity, num_actions) array, a dict
+    maps the state ids to their slots. When the table is full, the evict
+    fraction of the slots with the lowest stamp are freed at once: the stamp
+    of a slot is the tick it was last used for eviction="lru", the number
+    of times it was updated for eviction="visits".
+    '''
+    def __init__(self, num_actions, capacity, eviction="lru", evict=0.125):
+        if eviction not in ("lru", "visits"):
+            raise ValueError("unknown eviction %r" % (eviction,))
+        self.num_actions = num_actions
+        self.capacity = capacity
+        self.eviction = eviction
+        self.evict_count = max(1, int(capacity * evict))
+        self.values = np.zeros((capacity, num_actions))
+        self.states = np.zeros(capacity, dtype=np.int64)
+        self.stamps = np.zeros(capacity, dtype=np.int64)
+        self.slots = {}
+        self.free = list(range(capacity - 1, -1, -1))
+        self.ticks = 0
+        self.missing = np.zeros(num_actions)
+        self.missing.flags.writeable = False
+
+    def __len__(self):
+        return len(self.slots)
+
+    def __contains__(self, state):
+        return state in self.slots
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            state, action = key
+            return self.row(state)[action]
+        return self.row(key)
+
+    def __setitem__(self, key, value):
+        state, action = key
+        self.values[self.slot(state), action] = value
+
+    def row(self, state):
+        '''return the action values of state, without adding it'''
+        slot = self.slots.get(state)
+        if slot is None:
+            return self.missing
+        if self.eviction == "lru":
+            self.ticks += 1
+            self.stamps[slot] = self.ticks
+        return self.values[slot]
+
+    def slot(self, state):
+        '''return the slot of state, added with zero values if missing, and stamp it'''
+        slot = self.slots.get(state)
+        if slot is None:
+            if not self.free:
+                self.evict_slots(self.evict_count)
+            slot = self.free.pop()
+            self.slots[state] = slot
+            self.states[slot] = state
+            self.values[slot] = 0
+            self.stamps[slot] = 0
+        if self.eviction == "lru":
+            self.ticks += 1
+            self.stamps[slot] = self.ticks
+        else:
+            self.stamps[slot] += 1
+        return slot
+
+    def evict_slots(self, count, keep=None):
+        '''free up to count used slots with the lowest stamps, except the slots in keep'''
+        stamps = self.stamps
+        if keep or self.free:
+            stamps = stamps.copy()
+            stamps[self.free] = np.iinfo(np.int64).max
+            if keep:
+                stamps[keep] = np.iinfo(np.int64).max
+            count = min(count, len(self.slots) - len(keep or ()))
+            if count <= 0:
+                return
+        victims = np.argpartition(stamps, count - 1)[:count]
+        for slot in victims.tolist():
+            del self.slots[int(self.states[slot])]
+        self.free.extend(victims.tolist())
+
+    def get_batch(self, states):
+        '''return the (N, num_actions) action values of an array of N state ids'''
+        slots = np.array([self.slots.get(state, -1) for state in states.tolist()], dtype=np.int64)
+        values = self.values[slots]
+        values[slots < 0] = 0
+        return values
+
+    def add_batch(self, states, actions, deltas):
+        '''add deltas to the values of the (state, action) pairs, repeated pairs add up
+
+        A batch of more states than the capacity is added capacity states at
+        a time, the states of a part can then be evicted by the next parts.
+        '''
+        unique, inverse = np.unique(states, return_inverse=True)
+        if len(unique) > self.capacity:
+            for first in range(0, len(unique), self.capacity):
+                part = (inverse >= first) & (inverse < first + self.capacity)
+                self.add_batch(states[part], actions[part], deltas[part])
+            return
+        # make room for the whole batch first, so no slot of it gets evicted
+        missing = sum(1 for state in unique.tolist() if state not in self.slots)
+        if missing > len(self.free):
+            keep = [self.slots[state] for state in unique.tolist() if state in self.slots]
+            self.evict_slots(max(self.evict_count, missing - len(self.free)), keep)
+        slots = np.array([self.slot(state) for state in unique.tolist()], dtype=np.int64)
+        np.add.at(self.values, (slots[inverse], actions), deltas)
@@ -0,0 +1,45 @@
+import numpy as np
+
+class StateIndexer:
+    '''maps integer observations to a flat state index of the Q-table
+
+    Each dimension d of the observation, clipped to [low[d], high[d]], is
+    cut into num_buckets[d] buckets. The bucket of every possible value is
+    computed once in a lookup table, already multiplied by the stride of the
+    dimension, so the index of an observation is the sum of one lookup per
+    dimension: q_table has num_states rows, one per bucket combination.
+    '''
+    def __init__(self, low, high, num_buckets):
+        self.low = np.asarray(low, dtype=np.int64)
+        self.high = np.asarray(high, dtype=np.int64)
+        self.num_buckets = tuple(int(n) for n in num_buckets)
+        self.num_states = int(np.prod(self.num_buckets))
+        self.strides = np.cumprod((1,) + self.num_buckets[:0:-1])[::-1]
+
+        self.luts = []
+        for low, high, buckets, stride in zip(self.low, self.high, self.num_buckets, self.strides):
+            values = np.arange(low, high + 1)
+            if high > low:
+                # round half to even, like round()
+                scaling = (buckets - 1) / (high - low)
+                bucket = np.rint(scaling * (values - low)).astype(np.int64)
+            else:
+                bucket = np.zeros(len(values), dtype=np.int64)
+            self.luts.append(bucket * stride)
+        # the scalar index reads plain lists, faster than numpy for one item
+        self.lists = [(int(low), int(high), lut.tolist()) for low, high, lut in zip(self.low, self.high, self.luts)]
+
+    def index(self, obs):
+        '''return the state index of one observation'''
+        index = 0
+        for (low, high, lut), value in zip(self.lists, obs):
+            index += lut[min(max(int(value), low), high) - low]
+        return index
+
+    def index_batch(self, obs):
+        '''return the state indices of an (N, dims) array of observations'''
+        values = np.clip(obs, self.low, self.high) - self.low
+        index = self.luts[0][values[:, 0]]
+        for d in range(1, len(self.luts)):
+            index = index + self.luts[d][values[:, d]]
+        return index
@@ -0,0 +1,36 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "gym_foo", "envs"))
+
+import data.dataUtils as data
+from batched_env import BatchedSnakeEnv
+from foo_env import FooEnv
+
+# right, down, left, up: the cycle of a 2x2 board from its top left square
+CYCLE = [0, 3, 1, 2]
+
+
+def test_full_board_win_matches_batched_env():
+    '''both envs give the same (reward, done) on every move up to a full board win'''
+    config = data.Config(rows=2, initial_snake_pos=(0, 0))
+    env = FooEnv(config, headless=True)
+    batched = BatchedSnakeEnv(1, config, seed=0)
+    env.reset(seed=0)
+    # the food of FooEnv follows the one of the batched board
+    env.game.get_food_pos()[:] = batched.food[0].tolist()
+
+    steps = []
+    for move in range(20):
+        action = CYCLE[move % len(CYCLE)]
+        obv, reward, done, info = env.step(action)
+        obvs, rewards, dones, info = batched.step([action])
+        steps.append((reward, done))
+        assert (reward, done) == (rewards[0], dones[0])
+        if done:
+            break
+        env.game.get_food_pos()[:] = batched.food[0].tolist()
+
+    assert steps[-1] == (1000, True)
+    assert env.game.is_won()
+    assert all(not done for reward, done in steps[:-1])